@@ -7,43 +7,40 @@
 import os
 import sys
 import json
-import requests
-import re
 
-from azure.storage.blob import BlobServiceClient
+from edi_source import build_source
+from config_manager import ConfigManager
+from x12_tokenizer import iter_segments
 
 from flask import Flask, request, jsonify
 
 app = Flask(__name__)
 
-from langchain.chat_models import AzureChatOpenAI
-
 from dotenv import load_dotenv
 import time
 
+from llm_cache import build_cache, make_key
+from llm_client import get_llm, parse_llm_json, LLM_MODEL_VERSION
+import debug_dump
+import request_log
+from request_log import log_payload
+
 env_path = '/opt/conda/envs/indranilenv/.env'
 load_dotenv(env_path)
 
 azure_openai_api_endpoint = os.getenv("OPENAI_API_ENDPOINT")
 azure_openai_api_key = os.getenv("azure_openai_api_key")
 
-print(azure_openai_api_key)
-print(azure_openai_api_endpoint)
+#print(azure_openai_api_key)
+#print(azure_openai_api_endpoint)
+
+log = request_log.get_logger("convert")
+request_log.install_flask(app)
 
-llm = AzureChatOpenAI(
-    deployment_name="Claims-Summary",  
-    model="gpt-4", 
-    azure_endpoint=azure_openai_api_endpoint,
-    api_key=azure_openai_api_key,
-    #api_type="azure",
-    api_version="2023-05-15"
-)
 
 def edi_to_json(edi_content):
-    segments = [seg.strip() for seg in edi_content.split("~") if seg.strip()]
     json_segments = []
-    for seg in segments:
-        elements = seg.split("*")
+    for elements in iter_segments(edi_content):
         if not elements:
             continue
         segment_id = elements[0]
@@ -79,8 +76,8 @@ def convert_edi_file_to_json(edi_content):
     return edi_to_json(edi_content)
 
 def dump_json_to_file(json_data, output_path):
-    with open(output_path, "w") as outfile:
-        json.dump(json_data, outfile, indent=4)
+    # Queued to the background writer under a unique name; None when dumps are off.
+    return debug_dump.submit(json_data, output_path)
 
 def process_extracted_json(extracted_json):
     processed = {"Submitter": [], "Receiver": [], "Payer": [], "Member": [], "Provider": []}
@@ -112,7 +109,7 @@ def process_extracted_json(extracted_json):
                 processed[current_group].extend(seg.get("values", []))
     return processed
 
-def extract_provider_details(processed_json):
+def provider_llm_request(processed_json):
     system_message = "You are a helpful assistant that extract healthcare provider related features from a Healthcare Claim inputted as JSON"
     provider_details = processed_json.get("Provider", [])
     prompt = f"""You are given provider details extracted from an EDI file as a list:
@@ -130,16 +127,19 @@ def extract_provider_details(processed_json):
     ),
     ("human", prompt),
     ]
-    ai_msg = llm.invoke(messages)
-    response = ai_msg.content
-    #print("Response 1 = ", response, " ", type(response))
-    response = response.replace('json','').replace("```","")
-    res = (m := re.search(r'({.*})', response, re.DOTALL)) and m.group(1)
-    #print("Response 2 = ", res)
-    provider_features = json.loads(res)
+    return messages, make_key(provider_details, prompt, LLM_MODEL_VERSION)
+
+def extract_provider_details(processed_json):
+    messages, cache_key = provider_llm_request(processed_json)
+    provider_features = llm_cache.get(cache_key)
+    if provider_features is not None:
+        return provider_features
+    ai_msg = get_llm().invoke(messages)
+    provider_features = parse_llm_json(ai_msg.content)
+    llm_cache.set(cache_key, provider_features)
     return provider_features
 
-def extract_member_details(processed_json):
+def member_llm_request(processed_json):
     system_message = "You are a helpful assistant that extract healthcare member related features from a Healthcare Claim inputted as JSON"
     member_details = processed_json.get("Member", [])
     prompt = f"""You are given member details extracted from an EDI file as a list:
@@ -158,11 +158,15 @@ def extract_member_details(processed_json):
     ),
     ("human", prompt),
     ]
-    ai_msg = llm.invoke(messages)
-    response = ai_msg.content
-    response = response.replace('json','').replace("```","")
-    res = (m := re.search(r'({.*})', response, re.DOTALL)) and m.group(1)
-    a = json.loads(res)
+    return messages, make_key(member_details, prompt, LLM_MODEL_VERSION)
+
+def extract_member_details(processed_json):
+    messages, cache_key = member_llm_request(processed_json)
+    a = llm_cache.get(cache_key)
+    if a is None:
+        ai_msg = get_llm().invoke(messages)
+        a = parse_llm_json(ai_msg.content)
+        llm_cache.set(cache_key, a)
     #print(a)
     b = json.dumps(a, indent=2)
     return b
@@ -170,27 +174,25 @@ def load_config(file_path):
     with open(file_path, 'r') as file:
         return json.load(file)
 
-config_for_edi = load_config("config_for_edi.config")
+config = ConfigManager("config_for_edi.config", reload_interval=2.0)
+config_for_edi = config.snapshot()
+llm_cache = build_cache(config_for_edi.get("llm_cache"))
+
+def apply_config(snapshot):
+    global config_for_edi, edi_store
+    config_for_edi = snapshot
+    edi_store = build_source(snapshot)
+    debug_dump.configure(snapshot.get("debug_dumps"))
+    request_log.configure(snapshot.get("logging"))
+
+apply_config(config_for_edi)
+config.on_reload(apply_config)
 
 def read_edi_from_blob():
-    # Create a BlobServiceClient using the connection string
-    CONTAINER_NAME = config_for_edi["blob_credentials"]["CONTAINER_NAME"]
     BLOB_NAME = config_for_edi["blob_credentials"]["BLOB_NAME"]
-
-    list_blob_string = config_for_edi["blob_credentials"]["CONNECTION_STRING"]
-    #print(list_blob_string)
-    
-    # Connection string with given credentials
-    CONNECTION_STRING = (
-        list_blob_string[0] + list_blob_string[1] + list_blob_string[2] + list_blob_string[3]
-    )
-    blob_service_client = BlobServiceClient.from_connection_string(CONNECTION_STRING)
-    container_client = blob_service_client.get_container_client(CONTAINER_NAME)
-    blob_client = container_client.get_blob_client(BLOB_NAME)
-    if not blob_client.exists():
+    blob_content = edi_store.read_bytes(BLOB_NAME)
+    if blob_content is None:
         return "no file exists in the blob"
-    downloader = blob_client.download_blob()
-    blob_content = downloader.readall()
     edi_string = blob_content.decode('utf-8')
     return edi_string
     
@@ -202,15 +204,11 @@ def convert_edi_api():
     edi_data = read_edi_from_blob()
     #is_valid = validate_edi_278(edi_data)
     json_data = convert_edi_file_to_json(edi_data)
-    print("Parsed data ----")
-    print(json_data)
-    print("============")
+    log_payload(log, "Parsed data", json_data)
     # Dump JSON output to a file.
-    output_path = "./json_object/edi_278_modified.json"
-    dump_json_to_file(json_data, output_path)
+    output_path = dump_json_to_file(json_data, "./json_object/edi_278_modified.json")
     processed_json = process_extracted_json(json_data)
-    print("processed data ----")
-    print(processed_json)
+    log_payload(log, "Processed data", processed_json)
     provider_features = extract_provider_details(processed_json)
     member_features = extract_member_details(processed_json)
     provider_features['FirstName']="Reyes"
@@ -221,11 +219,15 @@ def convert_edi_api():
     d['provider'] = provider_features
     d['member'] = member_features
     response = {
-        "message": f"Output JSON dumped to {output_path}",
+        "message": f"Output JSON dumped to {output_path}" if output_path else "Output JSON dump disabled",
         "data": d
     }
     return jsonify(response)
 
+@app.route('/stats', methods=['GET'])
+def stats_api():
+    return jsonify({"llm_cache": llm_cache.stats(), "debug_dumps": debug_dump.stats(), "logging": request_log.stats()})
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5002, debug=True)
     #app_validate.run(host='0.0.0.0', port=5001, debug=True)
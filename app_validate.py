@@ -6,100 +6,54 @@
 
 import os, json
 from flask import Flask, request, jsonify
-from azure.storage.blob import BlobServiceClient
+from edi_source import build_source
+from config_manager import ConfigManager
+from x12_tokenizer import iter_segments_bytes
+from x12_interchange import validate_edi_278
+import request_log
 
 app = Flask(__name__)
-
-def validate_edi_278(content):
-    """
-    if not os.path.exists(edi_file_path):
-        print(f"Error: File '{edi_file_path}' does not exist.")
-        return False
-    try:
-        with open(edi_file_path, "r") as f:
-            content = f.read()
-    except Exception as e:
-        print(f"Error reading file: {e}")
-        return False
-    """
-
-    segments = [seg.strip() for seg in content.split("~") if seg.strip()]
-
-    if not segments or not segments[0].startswith("ISA"):
-        print("Error: Missing or invalid ISA segment.")
-        return False
-    if not any(seg.startswith("GS") for seg in segments):
-        print("Error: Missing GS segment.")
-        return False
-
-    try:
-        st_index = next(i for i, seg in enumerate(segments) if seg.startswith("ST"))
-    except StopIteration:
-        print("Error: Missing ST segment.")
-        return False
-
-    try:
-        se_index = next(i for i, seg in enumerate(segments[st_index:], start=st_index) if seg.startswith("SE"))
-    except StopIteration:
-        print("Error: Missing SE segment.")
-        return False
-
-    transaction_count = se_index - st_index + 1
-    se_fields = segments[se_index].split("*")
-    try:
-        expected_count = int(se_fields[1])
-    except (IndexError, ValueError):
-        print("Error: Invalid SE segment count.")
-        return False
-
-    print(transaction_count, expected_count)
-    #if transaction_count != expected_count:
-       #print("Error: Transaction segment count mismatch.")
-     #   return False
-    if not any(seg.startswith("GE") for seg in segments):
-        print("Error: Missing GE segment.")
-        return False
-    if not segments[-1].startswith("IEA"):
-        print("Error: Missing IEA segment.")
-        return False
-
-    return True
+log = request_log.get_logger("validate")
+request_log.install_flask(app)
 
 def load_config(file_path):
     with open(file_path, 'r') as file:
         return json.load(file)
 
-config_for_edi = load_config("config_for_edi.config")
+config = ConfigManager("config_for_edi.config", reload_interval=2.0)
+config_for_edi = config.snapshot()
+edi_store = build_source(config_for_edi)
+request_log.configure(config_for_edi.get("logging"))
 
-def read_edi_from_blob():
-    # Create a BlobServiceClient using the connection string
-    CONTAINER_NAME = config_for_edi["blob_credentials"]["CONTAINER_NAME"]
-    BLOB_NAME = config_for_edi["blob_credentials"]["BLOB_NAME"]
+def apply_config(snapshot):
+    # Hot reload: swap in the new snapshot and rebuild the EDI source.
+    global config_for_edi, edi_store
+    config_for_edi = snapshot
+    edi_store = build_source(snapshot)
+    request_log.configure(snapshot.get("logging"))
 
-    list_blob_string = config_for_edi["blob_credentials"]["CONNECTION_STRING"]
-    #print(list_blob_string)
-    
-    # Connection string with given credentials
-    CONNECTION_STRING = (
-        list_blob_string[0] + list_blob_string[1] + list_blob_string[2] + list_blob_string[3]
-    )
-    blob_service_client = BlobServiceClient.from_connection_string(CONNECTION_STRING)
-    container_client = blob_service_client.get_container_client(CONTAINER_NAME)
-    blob_client = container_client.get_blob_client(BLOB_NAME)
-    if not blob_client.exists():
-        return "no file exists in the blob"
-    downloader = blob_client.download_blob()
-    blob_content = downloader.readall()
-    edi_string = blob_content.decode('utf-8')
-    return edi_string
+config.on_reload(apply_config)
+
+def read_edi_segments_from_blob():
+    # Streams the blob in chunks through the bytes tokenizer, so validation
+    # never holds the whole file (or a decoded copy of it) in memory.
+    BLOB_NAME = config_for_edi["blob_credentials"]["BLOB_NAME"]
+    chunks = edi_store.iter_chunks(BLOB_NAME)
+    if chunks is None:
+        return None
+    return iter_segments_bytes(chunks)
     
 @app.route('/validate', methods=['GET'])
 def validate_edi_api():
     #file_path = "../edi_files/edi_278.txt"
     #if not os.path.exists(file_path):
         #return jsonify({"error": f"File '{file_path}' does not exist."}), 404
-    edi_data = read_edi_from_blob()
-    is_valid = validate_edi_278(edi_data)
+    edi_segments = read_edi_segments_from_blob()
+    if edi_segments is None:
+        log.warning("No EDI file exists in the blob")
+        is_valid = False
+    else:
+        is_valid = validate_edi_278(edi_segments)
     message = f"EDI file Validity: {is_valid}"
     return jsonify({"message": message})
 
@@ -0,0 +1,105 @@
+"""Elements/sec of the NM1/PRV field classifiers: character loops vs field_classifiers.
+
+"before" is the original is_name/is_npi/is_taxonomy (per-character any(...)
+loops, 7-11 digit NPI heuristic); "after" is field_classifiers (str methods,
+one regex, table-driven Luhn check). Both are timed two ways:
+
+  extract  first name/NPI per NM1*82 and first taxonomy per PRV, as
+           extract_edi_fields does it
+  column   every element of a batch-sized column classified for all three
+           kinds; "after" uses classify_column(), which classifies each
+           distinct value once
+
+Generated NPIs carry a valid check digit, so both sides find one in every
+provider segment.
+
+Usage: python benchmarks/bench_classifiers.py [providers] [repeats]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import field_classifiers
+from field_classifiers import classify_column, npi_check_digit_valid
+
+def legacy_is_name(s):
+    words = s.split()
+    return len(words) in [2, 3, 4] and not any(char.isdigit() for char in s)
+
+def legacy_is_npi(s):
+    return s.isdigit() and 7 <= len(s) <= 11
+
+def legacy_is_taxonomy(s):
+    if not s.isalnum():
+        return False
+    if not (7 <= len(s) <= 11):
+        return False
+    return any(char.isdigit() for char in s) and any(char.isalpha() for char in s)
+
+def legacy_classify(s):
+    return (1 if legacy_is_name(s) else 0) | (2 if legacy_is_npi(s) else 0) | (4 if legacy_is_taxonomy(s) else 0)
+
+def make_npi(rng):
+    base = "".join(rng.choice("0123456789") for _ in range(9))
+    for digit in "0123456789":
+        if npi_check_digit_valid(base + digit):
+            return base + digit
+
+def make_segments(providers, files, rng):
+    # A batch of files drawn from a smaller pool of providers, as in real batches.
+    pool = []
+    for n in range(providers):
+        first, last = rng.choice(["JANE", "JAMES", "MARIA", "ROBERT"]), rng.choice(["ROBINSON", "MOORE", "REYES", "SMITH"])
+        nm1 = ("82", f"{first} {last} CLINIC", "XX", make_npi(rng))
+        prv = ("PE", "PXC", f"{rng.randint(100, 399)}RC{rng.randint(1000, 9999)}X")
+        pool.append((nm1, prv))
+    return [rng.choice(pool) for _ in range(files)]
+
+def first(elements, predicate):
+    for element in elements:
+        if predicate(element):
+            return element
+    return None
+
+def extract_before(segments):
+    return sum((first(nm1, legacy_is_name) is not None) + (first(nm1, legacy_is_npi) is not None)
+               + (first(prv, legacy_is_taxonomy) is not None) for nm1, prv in segments)
+
+def extract_after(segments):
+    return sum((field_classifiers.find_name(nm1) is not None) + (field_classifiers.find_npi(nm1) is not None)
+               + (field_classifiers.find_taxonomy(prv) is not None) for nm1, prv in segments)
+
+def column_before(column):
+    return [legacy_classify(element) for element in column]
+
+def best_time(fn, arg, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    providers = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    files = providers * 10
+    segments = make_segments(providers, files, random.Random(278))
+    column = [element for nm1, prv in segments for element in nm1 + prv]
+    print(f"files={files}  providers={providers}  elements={len(column)}  repeats={repeats}")
+    for label, fn, arg in [
+        ("extract before", extract_before, segments),
+        ("extract after", extract_after, segments),
+        ("column before", column_before, column),
+        ("column after", classify_column, column),
+    ]:
+        elapsed, found = best_time(fn, arg, repeats)
+        found = found if isinstance(found, int) else sum(1 for flags in found if flags)
+        print(f"{label:<15} {len(column) / elapsed:12,.0f} elements/sec  found={found}")
+
+if __name__ == "__main__":
+    main()
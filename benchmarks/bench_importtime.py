@@ -0,0 +1,68 @@
+"""Cold-start import budget for the Flask apps.
+
+Runs `python -X importtime -c "import <app>"` in a fresh interpreter for
+each app, reports the cumulative import time of the app module and its
+heaviest dependencies, and exits non-zero if any app is over budget so it
+can be tracked in CI.
+
+Usage: python benchmarks/bench_importtime.py [--budget-ms N] [--top N] [app ...]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Milliseconds of cumulative import time allowed per app module.
+BUDGETS_MS = {
+    "priorauth_workflow_2": 400,
+    "app_create_json": 300,
+    "app_validate": 200,
+}
+
+# Modules that should never be imported at startup any more.
+DEFERRED = ["langchain", "azure.storage.blob", "requests"]
+
+def import_profile(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("apps", nargs="*", default=list(BUDGETS_MS))
+    parser.add_argument("--budget-ms", type=float, help="override the per-app budget")
+    parser.add_argument("--top", type=int, default=8, help="heaviest imports to list per app")
+    args = parser.parse_args()
+
+    over_budget = []
+    for app in args.apps:
+        rows = import_profile(app)
+        total_ms = next(cumulative for name, _, cumulative in reversed(rows) if name == app) / 1000
+        budget = args.budget_ms or BUDGETS_MS.get(app, 300)
+        status = "ok" if total_ms <= budget else "OVER BUDGET"
+        print(f"{app}: {total_ms:.1f} ms (budget {budget:.0f} ms) {status}")
+        for name, _, cumulative in sorted(rows, key=lambda row: row[2], reverse=True)[1:args.top + 1]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+        eager = [name for name in DEFERRED if any(row[0] == name for row in rows)]
+        if eager:
+            print(f"    eagerly imported: {', '.join(eager)}")
+            status = "OVER BUDGET"
+        if status != "ok":
+            over_budget.append(app)
+    if over_budget:
+        print(f"over budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Load-test comparison of the Flask and ASGI prior-auth services.
+
+Fires the same /authentication_flow request at each running service with a
+fixed number of requests in flight and reports throughput, latency
+percentiles and errors per concurrency level. Start both services against
+the same config (e.g. "edi_source": {"backend": "local"}) first:
+
+  python priorauth_workflow_2.py                              (port 5007)
+  uvicorn priorauth_async:app --host 0.0.0.0 --port 5008      (port 5008)
+
+Usage: python benchmarks/bench_load.py --blob-url edi_278.txt
+           [--target flask=http://localhost:5007] [--target asgi=http://localhost:5008]
+           [--route /authentication_flow] [--requests N] [--concurrency 10,50,200]
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+DEFAULT_TARGETS = ["flask=http://localhost:5007", "asgi=http://localhost:5008"]
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+async def run_level(base_url, route, params, total, concurrency):
+    latencies = []
+    errors = 0
+    statuses = {}
+    remaining = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(route, params=params)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                    if response.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "throughput": total / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "errors": errors,
+        "statuses": statuses,
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blob-url", required=True)
+    parser.add_argument("--target", action="append", help="name=base_url, repeatable")
+    parser.add_argument("--route", default="/authentication_flow")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", default="10,50,200")
+    args = parser.parse_args()
+
+    targets = [t.split("=", 1) for t in (args.target or DEFAULT_TARGETS)]
+    levels = [int(c) for c in args.concurrency.split(",")]
+    params = {"blob_url": args.blob_url}
+
+    print(f"{'target':<8}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}  statuses")
+    for name, base_url in targets:
+        # Warm connections, caches and lazy clients before measuring.
+        await run_level(base_url, args.route, params, min(levels), min(levels))
+        for concurrency in levels:
+            result = await run_level(base_url, args.route, params, args.requests, concurrency)
+            print(f"{name:<8}{concurrency:>6}{result['throughput']:>10.1f}"
+                  f"{result['p50'] * 1000:>10.1f}{result['p95'] * 1000:>10.1f}{result['p99'] * 1000:>10.1f}"
+                  f"{result['errors']:>8}  {result['statuses']}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
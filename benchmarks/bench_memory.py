@@ -0,0 +1,101 @@
+"""Peak memory of reading a large EDI interchange: full read vs streaming.
+
+Builds a synthetic multi-transaction 278 interchange on disk and measures
+the tracemalloc peak of
+
+  full       read_bytes() + decode + split into segment lists (the old path)
+  streaming  LocalDirSource.iter_chunks() (mmap) + iter_segments_bytes()
+
+Usage: python benchmarks/bench_memory.py [transactions] [chunk_size]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from edi_source import LocalDirSource
+from x12_tokenizer import iter_segments_bytes
+
+TRANSACTION = [
+    "ST*278*{ctl}",
+    "BHT*0007*13*REF{ctl}*20250101*1200",
+    "HL*1**20*1",
+    "NM1*82*2*PROVIDER NUMBER {ctl}*****XX*1932102084",
+    "N3*2940 N MCCORD RD TOLEDO OH 436151753",
+    "N4*City*State*Zip",
+    "PRV*PE*PXC*207RC0000X",
+    "HL*2*1*21*1",
+    "NM1*IL*1*Robinson*James****MI*MEMBER{ctl}",
+    "DOB*09-01-1947",
+    "N3*3146 Charles Mountains Apt. 183, Port Jacob, MD 58011",
+    "HL*3*2*22*0",
+    "EB*True*01-01-2024*12-31-2025",
+    "DMG*D8*01-01-1980",
+    "GRP*ABC Pvt Ltd",
+    "PB*Basic Coverage Plan*PPO",
+    "BEN*Preventive Care*Annual checkup, immunizations, and screenings",
+    "PA*Approved*AUTH56789*02-01-2022*12-31-2026",
+    "ICD*ICD10-A01",
+    "CPT*CPT-99213",
+]
+
+def write_interchange(path, transactions):
+    with open(path, "w") as f:
+        f.write("ISA*00*          *00*          *ZZ*SUBMITTER01    *ZZ*RECEIVER01     "
+                "*250101*1200*U*00401*000000001*0*P*:~\n")
+        f.write("GS*HI*SUBMITTER01*RECEIVER01*PAYER01*20250101*1200*1*X*004010X278A1~\n")
+        for n in range(transactions):
+            ctl = f"{n + 1:09d}"
+            for seg in TRANSACTION:
+                f.write(seg.format(ctl=ctl) + "~\n")
+            f.write(f"SE*{len(TRANSACTION) + 1}*{ctl}~\n")
+        f.write(f"GE*{transactions}*1~\n")
+        f.write("IEA*1*000000001~\n")
+
+def consume(segments):
+    # Stand-in for a single-pass validator: touch every segment, keep counters only.
+    count = 0
+    last_tag = None
+    for seg in segments:
+        count += 1
+        last_tag = seg[0]
+    return count, last_tag
+
+def full_read(directory, name):
+    with open(os.path.join(directory, name), "rb") as f:
+        data = f.read()
+    text = data.decode("utf-8")
+    segments = [seg.strip().split("*") for seg in text.split("~") if seg.strip()]
+    return consume(segments)
+
+def streaming_read(directory, name, chunk_size):
+    source = LocalDirSource(directory, chunk_size)
+    return consume(iter_segments_bytes(source.iter_chunks(name)))
+
+def measure(label, fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} segments={result[0]:>9}  peak={peak / 1024 / 1024:8.2f} MiB  time={elapsed:6.2f}s")
+    return peak
+
+def main():
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1024 * 1024
+    with tempfile.TemporaryDirectory() as directory:
+        name = "interchange_278.txt"
+        write_interchange(os.path.join(directory, name), transactions)
+        size = os.path.getsize(os.path.join(directory, name))
+        print(f"file size={size / 1024 / 1024:.2f} MiB  transactions={transactions}  chunk_size={chunk_size}")
+        full_peak = measure("full", full_read, directory, name)
+        stream_peak = measure("streaming", streaming_read, directory, name, chunk_size)
+        print(f"streaming peak is {stream_peak / full_peak:.1%} of full read")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Segments/sec and bytes/segment: dict segments + elif ladder vs Segment + dispatch table.
+
+"before" reproduces the original list-of-dicts parse_edi_file output and the
+if/elif extract_edi_fields; "after" builds x12_tokenizer.Segment objects and
+runs the dispatch-table extract_edi_fields from priorauth_workflow_2.
+
+Usage: python benchmarks/bench_segments.py [transactions] [repeats]
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import priorauth_workflow_2 as workflow
+from field_classifiers import is_name, is_npi, is_taxonomy
+from x12_tokenizer import Segment, tokenize
+
+def legacy_extract_edi_fields(parsed_segments):
+    output = {"member": {}, "provider": {}, "submitter": "", "receiver": "", "payer": "",
+              "eligibility": {}, "policy_benefits": {"details": []}, "basic_auth": {},
+              "icd_codes": [], "cpt_codes": []}
+    for seg in parsed_segments:
+        tag = seg.get("tag")
+        elems = seg.get("elements", [])
+        if tag == "GS":
+            if len(elems) >= 4:
+                output["submitter"] = elems[1]
+                output["receiver"] = elems[2]
+                output["payer"] = elems[3]
+        elif tag == "NM1":
+            if elems and elems[0] == "82":
+                for element in elems:
+                    if not output["provider"].get("name") and is_name(element):
+                        output["provider"]["name"] = element
+                    if not output["provider"].get("npi") and is_npi(element):
+                        output["provider"]["npi"] = element
+            elif elems and elems[0] == "IL":
+                if len(elems) >= 5:
+                    output["member"]["name"] = f"{elems[2]} {elems[1]}"
+                    output["member"]["member_id"] = elems[4]
+        elif tag == "DOB":
+            if elems:
+                output["member"]["dob"] = elems[0]
+        elif tag == "N3":
+            if "name" in output["provider"] and "address" not in output["provider"]:
+                output["provider"]["address"] = elems[0]
+            elif "name" in output["member"] and "address" not in output["member"]:
+                output["member"]["address"] = elems[0]
+        elif tag == "PRV":
+            for element in elems:
+                if not output["provider"].get("taxonomy") and is_taxonomy(element):
+                    output["provider"]["taxonomy"] = element
+        elif tag == "EB":
+            if len(elems) >= 3:
+                output["eligibility"].update(is_eligible=elems[0], start_date=elems[1], end_date=elems[2])
+        elif tag == "DMG":
+            if len(elems) >= 2:
+                output["eligibility"]["subscriber_dob"] = elems[1]
+        elif tag == "GRP":
+            if elems:
+                output["eligibility"]["group_no"] = elems[0]
+        elif tag == "PB":
+            if len(elems) >= 2:
+                output["policy_benefits"]["PolicyName"] = elems[0]
+                output["policy_benefits"]["Coverage"] = elems[1]
+        elif tag == "BEN":
+            if len(elems) >= 2:
+                output["policy_benefits"]["details"].append({"type": elems[0], "description": elems[1]})
+        elif tag == "PA":
+            if len(elems) >= 4:
+                output["basic_auth"].update(auth_status=elems[0], auth_number=elems[1],
+                                            auth_date=elems[2], auth_expiry_date=elems[3])
+        elif tag == "ICD":
+            if elems:
+                output["icd_codes"].append(elems[0])
+        elif tag == "CPT":
+            if elems:
+                output["cpt_codes"].append(elems[0])
+    return output
+
+def build_dicts(tokens):
+    parsed = []
+    for seg in tokens:
+        filtered = [elem for elem in (e.strip() for e in seg) if len(elem) > 1]
+        if filtered:
+            parsed.append({"tag": filtered[0], "elements": filtered[1:]})
+    return parsed
+
+def build_segments(tokens):
+    parsed = []
+    for seg in tokens:
+        filtered = [elem for elem in (e.strip() for e in seg) if len(elem) > 1]
+        if filtered:
+            parsed.append(Segment(filtered[0], tuple(filtered[1:])))
+    return parsed
+
+def bytes_per_segment(build, tokens):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    parsed = build(tokens)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (after - before) / len(parsed)
+
+def best_time(fn, arg, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    edi = workflow.generate_edi_278(workflow.claim_values["edi_features"], os.devnull)
+    tokens = tokenize(edi)
+    st = next(i for i, seg in enumerate(tokens) if seg[0] == "ST")
+    se = next(i for i, seg in enumerate(tokens) if seg[0] == "SE")
+    tokens = tokens[:st] + tokens[st:se + 1] * transactions + tokens[se + 1:]
+
+    legacy = json.dumps(legacy_extract_edi_fields(build_dicts(tokens)), sort_keys=True)
+    current = json.dumps(workflow.extract_edi_fields(build_segments(tokens)), sort_keys=True)
+    assert legacy == current, "dispatch-table extraction differs from the legacy elif ladder"
+
+    print(f"segments={len(tokens)}  repeats={repeats}")
+    for label, build, extract in [
+        ("before", build_dicts, legacy_extract_edi_fields),
+        ("after", build_segments, workflow.extract_edi_fields),
+    ]:
+        parsed = build(tokens)
+        build_rate = len(tokens) / best_time(build, tokens, repeats)
+        extract_rate = len(parsed) / best_time(extract, parsed, repeats)
+        size = bytes_per_segment(build, tokens)
+        print(f"{label:<7} build {build_rate:12,.0f} segments/sec  extract {extract_rate:12,.0f} segments/sec"
+              f"  {size:7.1f} bytes/segment")
+
+if __name__ == "__main__":
+    main()
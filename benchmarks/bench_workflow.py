@@ -0,0 +1,288 @@
+"""Offline latency/throughput of the prior-auth pipeline on a synthetic 278 corpus.
+
+Generates N transactions with generate_edi_278 from randomized details
+(providers drawn from a pool, members, benefit lists, ICD/CPT counts, a
+share of expired eligibility windows), writes them as single-transaction
+files and as multi-transaction interchanges, and times
+
+  validate     validate_edi_278 on each transaction (including tokenizing)
+  parse        parse_edi_file on each transaction
+  extract      extract_edi_fields on each parsed transaction
+  workflow     authenticate_file per single-transaction file (one request each)
+  interchange  authenticate_file per interchange (one request each)
+
+The LLM and the provider/member match services are mock_services fakes in
+process: instant and error-free apart from --score-latency-ms per scoring
+call, unless --mock-config sets latency distributions, error rates or 5xx
+bursts (same format as MOCK_SERVICES_CONFIG). The score cache is off unless
+--score-cache is given. Each phase reports p50/p95/p99 latency, throughput
+and the process's peak RSS so far.
+
+--json writes the results; --baseline compares against an earlier --json
+run and exits 1 if any phase's p95 grew (or throughput fell) by more than
+--tolerance.
+
+Usage: python benchmarks/bench_workflow.py [--transactions N] [--interchange-size K]
+           [--providers P] [--concurrency C] [--score-latency-ms MS] [--expired 0.1]
+           [--mock-config mock.json] [--score-cache] [--seed S]
+           [--json out.json] [--baseline old.json] [--tolerance 0.2]
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import mock_services
+import priorauth_workflow_2 as workflow
+from claim_dates import bind_request_clock
+from edi_source import build_source
+from field_classifiers import npi_check_digit_valid
+from stage_graph import SharedResults
+
+FIRST_NAMES = ["JAMES", "MARIA", "ROBERT", "LINDA", "DAVID", "SUSAN", "CARLOS", "AISHA", "WEI", "PRIYA"]
+LAST_NAMES = ["ROBINSON", "MOORE", "REYES", "SMITH", "NGUYEN", "PATEL", "GARCIA", "OKAFOR", "MULLER", "KIM"]
+STREETS = ["N MCCORD RD", "CHARLES MOUNTAINS", "MAIN ST", "OAK AVE", "LAKE SHORE DR", "ELM ST"]
+BENEFITS = [
+    {"type": "Preventive Care", "description": "Annual checkup, immunizations, and screenings"},
+    {"type": "Emergency Care", "description": "24/7 emergency room services"},
+    {"type": "Specialist Visit", "description": "Referral based specialist consultations"},
+    {"type": "Imaging", "description": "MRI, CT and X-ray services"},
+    {"type": "Pharmacy", "description": "Generic and brand prescriptions"},
+    {"type": "Maternity", "description": "Prenatal and postnatal care"},
+]
+
+def make_npi(rng):
+    base = "".join(rng.choice("0123456789") for _ in range(9))
+    for digit in "0123456789":
+        if npi_check_digit_valid(base + digit):
+            return base + digit
+
+def mdy(date):
+    return date.strftime("%m-%d-%Y")
+
+def make_provider(rng):
+    return {
+        "npi": make_npi(rng),
+        "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "address": f"{rng.randint(100, 9999)} {rng.choice(STREETS)} TOLEDO OH {rng.randint(10000, 99999)}",
+        "taxonomy": f"{rng.randint(100, 399)}RC{rng.randint(1000, 9999)}X",
+    }
+
+def make_details(rng, n, providers, now, expired):
+    # One transaction's details; roughly `expired` of them have an eligibility
+    # window that ended before now, so the early rejection path is exercised.
+    start = now - datetime.timedelta(days=rng.randint(30, 700))
+    end = now + datetime.timedelta(days=rng.randint(30, 700))
+    if rng.random() < expired:
+        end = now - datetime.timedelta(days=rng.randint(1, 365))
+    dob = datetime.date(rng.randint(1940, 2010), rng.randint(1, 12), rng.randint(1, 28))
+    return {
+        "member": {
+            "member_id": f"MEM{n:08d}",
+            "name": f"{rng.choice(FIRST_NAMES).title()} {rng.choice(LAST_NAMES).title()}",
+            "address": f"{rng.randint(1, 9999)} {rng.choice(STREETS).title()}, Port Jacob, MD {rng.randint(10000, 99999)}",
+            "dob": mdy(dob),
+        },
+        "provider": rng.choice(providers),
+        "submitter": "Submitter Sanders",
+        "receiver": "Receiver Roberts",
+        "payer": "Payer Paddington",
+        "eligibility": {"is_eligible": "True", "start_date": mdy(start), "end_date": mdy(end),
+                        "group_no": "ABC Pvt Ltd", "subscriber_dob": mdy(dob)},
+        "policy_benefits": {"PolicyName": "Basic Coverage Plan", "Coverage": rng.choice(["PPO", "HMO", "EPO"]),
+                            "details": rng.sample(BENEFITS, rng.randint(0, len(BENEFITS)))},
+        "prior_auth": {"auth_status": "Approved", "auth_number": f"AUTH{rng.randint(10000, 99999)}",
+                       "auth_date": mdy(start), "auth_expiry_date": mdy(now + datetime.timedelta(days=rng.randint(30, 700)))},
+        "icd_codes": [f"ICD10-{rng.choice('ABCDEFGHJK')}{rng.randint(0, 99):02d}" for _ in range(rng.randint(1, 12))],
+        "cpt_codes": [f"CPT-{rng.randint(10000, 99999)}" for _ in range(rng.randint(1, 12))],
+    }
+
+def make_interchange(texts):
+    # One ISA/GS envelope around the ST..SE bodies of several generated
+    # transactions, renumbered so every control number is unique.
+    first = texts[0].split("\n")
+    lines = first[:2]
+    for n, text in enumerate(texts):
+        segments = text.split("\n")
+        st = next(i for i, seg in enumerate(segments) if seg.startswith("ST*"))
+        se = next(i for i, seg in enumerate(segments) if seg.startswith("SE*"))
+        control = f"{n + 1:04d}"
+        lines.append(f"ST*278*{control}~")
+        lines.extend(segments[st + 1:se])
+        lines.append(f"SE*{se - st + 1}*{control}~")
+    # The GE of the generated file carries the group control number.
+    group_control = first[-2].rstrip("~").split("*")[2]
+    lines.append(f"GE*{len(texts)}*{group_control}~")
+    lines.append(first[-1])
+    return "\n".join(lines)
+
+def build_corpus(directory, transactions, interchange_size, provider_count, expired, seed):
+    rng = random.Random(seed)
+    # generate_edi_278 draws its control numbers from the random module.
+    random.seed(seed)
+    now = datetime.datetime.now()
+    providers = [make_provider(rng) for _ in range(provider_count)]
+    texts = []
+    singles = []
+    for n in range(transactions):
+        name = f"single_{n:06d}.txt"
+        texts.append(workflow.generate_edi_278(make_details(rng, n, providers, now, expired), os.path.join(directory, name)))
+        singles.append(name)
+    interchanges = []
+    for n in range(0, transactions, interchange_size):
+        name = f"interchange_{n // interchange_size:04d}.txt"
+        with open(os.path.join(directory, name), "w") as f:
+            f.write(make_interchange(texts[n:n + interchange_size]))
+        interchanges.append(name)
+    return texts, singles, interchanges
+
+def install_fakes(score_latency_ms, mock_config, score_cache):
+    # Instant, error-free fakes unless --mock-config asks for more.
+    fixed = {"latency": {"distribution": "fixed", "ms": score_latency_ms}, "error_rate": 0.0}
+    settings = {"llm": {"latency": {"distribution": "fixed", "ms": 0}, "error_rate": 0.0},
+                "provider_match": dict(fixed), "member_match": dict(fixed)}
+    if mock_config:
+        with open(mock_config) as f:
+            overrides = json.load(f)
+        for service, values in overrides.items():
+            settings[service] = dict(settings.get(service) or {}, **values) if isinstance(values, dict) else values
+    workflow.score_cache.enabled = score_cache
+    return mock_services.install(settings)
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def measure(fn, items, concurrency=1):
+    # Runs fn on every item and returns (latencies, elapsed, results).
+    def timed(item):
+        start = time.perf_counter()
+        result = fn(item)
+        return time.perf_counter() - start, result
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(timed, items))
+    else:
+        outcomes = [timed(item) for item in items]
+    elapsed = time.perf_counter() - start
+    return sorted(latency for latency, _ in outcomes), elapsed, [result for _, result in outcomes]
+
+def summarize(name, latencies, elapsed, units, statuses=None):
+    return {
+        "phase": name,
+        "items": len(latencies),
+        "throughput": units / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+        "statuses": statuses or {},
+    }
+
+def authenticate(claim_values):
+    def run(name):
+        # One request: its own clock and its own shared provider/member results.
+        bind_request_clock()
+        return workflow.combine_transactions(workflow.authenticate_file(name, claim_values, SharedResults()))
+    return run
+
+def count_statuses(responses):
+    statuses = {}
+    for response in responses:
+        results = [t["result"] for t in response["data"]["transactions"]] if "transactions" in response.get("data", {}) else [response]
+        for result in results:
+            statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    return statuses
+
+def regressions(results, baseline, tolerance):
+    previous = {row["phase"]: row for row in baseline}
+    found = []
+    for row in results:
+        old = previous.get(row["phase"])
+        if old is None:
+            continue
+        if old["p95_ms"] and row["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            found.append(f"{row['phase']}: p95 {old['p95_ms']:.2f} -> {row['p95_ms']:.2f} ms")
+        if row["throughput"] < old["throughput"] * (1 - tolerance):
+            found.append(f"{row['phase']}: throughput {old['throughput']:.1f} -> {row['throughput']:.1f}/s")
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=1000)
+    parser.add_argument("--interchange-size", type=int, default=100)
+    parser.add_argument("--providers", type=int, default=0, help="provider pool size, default transactions / 4")
+    parser.add_argument("--concurrency", type=int, default=1, help="requests in flight in the workflow phases")
+    parser.add_argument("--score-latency-ms", type=float, default=0.0)
+    parser.add_argument("--expired", type=float, default=0.1, help="share of transactions with an expired eligibility window")
+    parser.add_argument("--mock-config", help="mock_services settings (latency, error_rate, bursts) to apply over the defaults")
+    parser.add_argument("--score-cache", action="store_true")
+    parser.add_argument("--seed", type=int, default=278)
+    parser.add_argument("--json", help="write the results here")
+    parser.add_argument("--baseline", help="results of an earlier --json run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    claim_values = workflow.config.snapshot()
+    fakes = install_fakes(args.score_latency_ms, args.mock_config, args.score_cache)
+    with tempfile.TemporaryDirectory() as directory:
+        workflow.edi_store = build_source({"edi_source": {"backend": "local", "directory": directory}})
+        start = time.perf_counter()
+        texts, singles, interchanges = build_corpus(directory, args.transactions, args.interchange_size,
+                                                    args.providers or max(1, args.transactions // 4),
+                                                    args.expired, args.seed)
+        print(f"transactions={len(texts)}  interchanges={len(interchanges)}x{args.interchange_size}  "
+              f"concurrency={args.concurrency}  score_latency_ms={args.score_latency_ms}  "
+              f"score_cache={args.score_cache}  generated in {time.perf_counter() - start:.2f}s")
+
+        results = []
+        latencies, elapsed, _ = measure(workflow.validate_edi_278, texts)
+        results.append(summarize("validate", latencies, elapsed, len(texts)))
+        latencies, elapsed, parsed = measure(lambda text: workflow.parse_edi_file(text, os.devnull), texts)
+        results.append(summarize("parse", latencies, elapsed, len(texts)))
+        latencies, elapsed, _ = measure(workflow.extract_edi_fields, parsed)
+        results.append(summarize("extract", latencies, elapsed, len(texts)))
+        latencies, elapsed, responses = measure(authenticate(claim_values), singles, args.concurrency)
+        results.append(summarize("workflow", latencies, elapsed, len(singles), count_statuses(responses)))
+        latencies, elapsed, responses = measure(authenticate(claim_values), interchanges, args.concurrency)
+        # Throughput is transactions/s here; latency is per interchange.
+        results.append(summarize("interchange", latencies, elapsed, len(texts), count_statuses(responses)))
+
+    print(f"{'phase':<12}{'items':>7}{'tx/s':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak RSS MB':>13}  statuses")
+    for row in results:
+        print(f"{row['phase']:<12}{row['items']:>7}{row['throughput']:>11.1f}{row['p50_ms']:>10.3f}"
+              f"{row['p95_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['peak_rss_mb']:>13.1f}  {row['statuses']}")
+    for name, stats in fakes.stats().items():
+        print(f"downstream {name}: {stats}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
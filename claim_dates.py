@@ -0,0 +1,65 @@
+import contextvars
+import datetime
+import functools
+
+# Date handling for the eligibility (EB) and prior-auth (PA) windows.
+# parse_date() memoizes every value it has seen per format table, and takes
+# a slicing fast path for the mm-dd-yyyy dates the 278s carry, so a batch
+# that repeats the same coverage dates never reaches strptime twice.
+# Each request reads the clock once (bind_request_clock) and every window
+# check in it compares against that same instant.
+
+WINDOW_FORMATS = ("%m-%d-%Y", "%Y%m%d")
+
+_request_now = contextvars.ContextVar("request_now", default=None)
+
+def bind_request_clock(now=None):
+    return _request_now.set(now or datetime.datetime.now())
+
+def request_now():
+    now = _request_now.get()
+    return now if now is not None else datetime.datetime.now()
+
+def _mm_dd_yyyy(value):
+    if len(value) == 10 and value[2] == "-" and value[5] == "-" and value.isascii():
+        month, day, year = value[0:2], value[3:5], value[6:10]
+        if month.isdigit() and day.isdigit() and year.isdigit():
+            try:
+                return datetime.datetime(int(year), int(month), int(day))
+            except ValueError:
+                return None
+    return None
+
+@functools.lru_cache(maxsize=4096)
+def parse_date(value, formats=WINDOW_FORMATS):
+    # Returns a datetime, or None when value matches none of the formats.
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if formats[0] == "%m-%d-%Y":
+        parsed = _mm_dd_yyyy(value)
+        if parsed is not None:
+            return parsed
+    for fmt in formats:
+        try:
+            return datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+def check_window(flag, accepted, start, end, now):
+    # Returns None when flag is accepted and today falls inside [start, end],
+    # otherwise the reason the window check failed. Both dates are whole
+    # days: a window ending today is still open until midnight.
+    if str(flag or "").strip().lower() not in accepted:
+        return "not_active"
+    start_date = parse_date(start)
+    end_date = parse_date(end)
+    if start_date is None or end_date is None:
+        return "malformed_date"
+    today = now.date()
+    if today < start_date.date():
+        return "not_started"
+    if today > end_date.date():
+        return "expired"
+    return None
@@ -0,0 +1,103 @@
+import json
+import os
+import signal
+import threading
+import time
+from types import MappingProxyType
+
+import request_log
+
+# Loads a JSON config file once and serves an immutable snapshot of it.
+# Dicts are frozen into read-only mappings and lists into tuples, so a
+# snapshot can be shared across request threads safely. A daemon thread
+# polls the file mtime (and SIGHUP forces a check) and swaps in a freshly
+# parsed snapshot atomically; readers only ever dereference the current
+# snapshot, so the request path never touches disk. A config that fails
+# to parse is reported and the previous snapshot stays in place.
+
+log = request_log.get_logger("config")
+
+def freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def thaw(value):
+    if isinstance(value, MappingProxyType):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+class ConfigManager:
+    def __init__(self, path, reload_interval=2.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self.reload_errors = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._mtime = os.stat(path).st_mtime
+        self._snapshot = freeze(self._read())
+        self._watcher = None
+        if reload_interval:
+            self._watcher = threading.Thread(target=self._watch, name=f"config-watch-{os.path.basename(path)}", daemon=True)
+            self._watcher.start()
+
+    def _read(self):
+        with open(self.path, 'r') as file:
+            return json.load(file)
+
+    def snapshot(self):
+        return self._snapshot
+
+    def on_reload(self, listener):
+        # listener(snapshot) runs after every successful reload.
+        self._listeners.append(listener)
+
+    def reload(self):
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime
+                snapshot = freeze(self._read())
+            except (OSError, ValueError) as err:
+                self.reload_errors += 1
+                log.error("Config reload failed, keeping previous config", extra={"fields": {"path": self.path, "error": str(err)}})
+                return False
+            self._mtime = mtime
+            self._snapshot = snapshot
+            self.reloads += 1
+        log.info("Config reloaded", extra={"fields": {"path": self.path}})
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as err:
+                log.exception("Config reload listener failed")
+        return True
+
+    def check(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime != self._mtime:
+            return self.reload()
+        return False
+
+    def _watch(self):
+        while True:
+            time.sleep(self.reload_interval)
+            self.check()
+
+    def install_sighup(self):
+        # Only possible from the main thread and on platforms with SIGHUP.
+        try:
+            signal.signal(signal.SIGHUP, lambda signum, frame: threading.Thread(target=self.reload, daemon=True).start())
+        except (AttributeError, ValueError):
+            return False
+        return True
+
+    def stats(self):
+        return {"path": self.path, "reloads": self.reloads, "reload_errors": self.reload_errors, "mtime": self._mtime}
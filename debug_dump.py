@@ -0,0 +1,101 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+import request_log
+
+# Optional, non-blocking debug dumps of intermediate JSON (parsed segments,
+# converted EDI). Disabled unless "debug_dumps": {"enabled": true}. When
+# enabled, submit() only enqueues the payload; a background thread
+# serializes it and writes it to a unique per-request file derived from the
+# configured path (output/edi_278_extracted.json becomes
+# output/edi_278_extracted_<timestamp>_<id>.json), so concurrent requests
+# never clobber each other and the request path never waits on disk. If
+# the queue is full the dump is dropped and counted rather than blocking.
+
+log = request_log.get_logger("debug_dump")
+
+_settings = {"enabled": False, "queue_size": 1000}
+_queue = None
+_worker = None
+_lock = threading.Lock()
+_counters = {"submitted": 0, "written": 0, "dropped": 0, "errors": 0}
+_counters_lock = threading.Lock()
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+def configure(settings):
+    with _lock:
+        _settings.update(settings or {})
+
+def enabled():
+    return bool(_settings.get("enabled"))
+
+def unique_path(output_path):
+    root, ext = os.path.splitext(output_path)
+    stamp = time.strftime("%Y%m%d%H%M%S")
+    return f"{root}_{stamp}_{uuid.uuid4().hex[:8]}{ext or '.json'}"
+
+def _default(obj):
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    return str(obj)
+
+def _write(payload, path):
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=4, default=_default)
+
+def _run():
+    while True:
+        payload, path = _queue.get()
+        try:
+            _write(payload, path)
+            _count("written")
+        except Exception as err:
+            _count("errors")
+            log.error("Debug dump failed", extra={"fields": {"path": path, "error": str(err)}})
+        finally:
+            _queue.task_done()
+
+def _ensure_worker():
+    global _queue, _worker
+    if _worker is None:
+        with _lock:
+            if _worker is None:
+                _queue = queue.Queue(maxsize=_settings.get("queue_size", 1000))
+                _worker = threading.Thread(target=_run, name="debug-dump-writer", daemon=True)
+                _worker.start()
+
+def submit(payload, output_path):
+    # Returns the path the dump will be written to, or None if dumps are off
+    # or the queue is full.
+    if not enabled():
+        return None
+    _ensure_worker()
+    path = unique_path(output_path)
+    try:
+        _queue.put_nowait((payload, path))
+    except queue.Full:
+        _count("dropped")
+        return None
+    _count("submitted")
+    return path
+
+def flush():
+    if _queue is not None:
+        _queue.join()
+
+def stats():
+    with _counters_lock:
+        stats = dict(_counters)
+    stats["enabled"] = enabled()
+    stats["pending"] = _queue.qsize() if _queue is not None else 0
+    return stats
@@ -0,0 +1,56 @@
+from claim_dates import parse_date
+
+# Rule-based stand-in for extract_provider_details / extract_member_details.
+# Both LLM prompts only reshape fields that extract_edi_fields already pulled
+# out, so the same payloads can be built locally. Each normalizer returns the
+# payload together with the list of keys it could not resolve; the caller
+# decides whether to fall back to the LLM for those.
+
+NA = "NA"
+
+DOB_FORMATS = ("%m-%d-%Y", "%m/%d/%Y", "%Y%m%d", "%Y-%m-%d", "%m%d%Y", "%m-%d-%y", "%m/%d/%y")
+
+def _clean(value):
+    if value is None:
+        return ""
+    return " ".join(str(value).split())
+
+def _first(details, keys):
+    for key in keys:
+        value = _clean(details.get(key))
+        if value:
+            return value
+    return ""
+
+def normalize_dob(value):
+    # Returns the date of birth as mm-dd-yyyy, or "" if it can't be parsed.
+    parsed = parse_date(_clean(value), DOB_FORMATS)
+    return parsed.strftime("%m-%d-%Y") if parsed is not None else ""
+
+def normalize_provider(provider_details):
+    npi = _first(provider_details, ["npi", "provider_npi", "Npi"])
+    name = _first(provider_details, ["name", "provider_name", "Name"])
+    address = _first(provider_details, ["address", "provider_address", "Address1"])
+    words = name.split()
+    features = {
+        "Npi": npi,
+        "FirstName": words[0] if words else "",
+        "LastName": words[-1] if words else "",
+        "Address1": address,
+    }
+    missing = [key for key, value in features.items() if not value]
+    for key in missing:
+        features[key] = NA
+    return features, missing
+
+def normalize_member(member_details):
+    features = {
+        "member_id": _first(member_details, ["member_id", "id", "memberId"]),
+        "name": _first(member_details, ["name", "member_name", "Name"]),
+        "dob": normalize_dob(_first(member_details, ["dob", "date_of_birth", "DOB"])),
+        "address": _first(member_details, ["address", "member_address", "member_Address"]),
+    }
+    missing = [key for key, value in features.items() if not value]
+    for key in missing:
+        features[key] = NA
+    return features, missing
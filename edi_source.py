@@ -0,0 +1,168 @@
+import asyncio
+import mmap
+import os
+import threading
+
+# Pluggable source for EDI 278 content. The apps only ever ask a source for
+# the bytes of a named blob; build_source() picks the backend from the
+# "edi_source" config section:
+#
+#   {"backend": "azure"}                          -> Azure Blob Storage (default)
+#   {"backend": "local", "directory": "edi_in"}   -> files in a local directory
+#   {"backend": "memory"}                         -> in-process dict, filled with put()
+#
+# The local and memory backends let the full pipeline be replayed offline
+# without network noise. Every backend's read_bytes() returns None when the
+# blob does not exist, and list_names(prefix) lists blob names for batches.
+# iter_chunks() returns an iterator of byte chunks (or None when the blob
+# does not exist) for the streaming tokenizer: a chunked download for Azure
+# and mmap slices for local files, so large interchanges are never held in
+# memory whole. aread_bytes() is the coroutine form used by the ASGI app;
+# for Azure it goes through the aio client so no thread waits on the download.
+
+CHUNK_SIZE = 1024 * 1024
+
+_clients = {}
+_async_clients = {}
+_lock = threading.Lock()
+
+def connection_string(blob_credentials):
+    return "".join(blob_credentials["CONNECTION_STRING"])
+
+def get_blob_service_client(blob_credentials, chunk_size=CHUNK_SIZE):
+    # One long-lived BlobServiceClient per connection string, built on first use.
+    from azure.storage.blob import BlobServiceClient
+    conn_str = connection_string(blob_credentials)
+    client = _clients.get(conn_str)
+    if client is None:
+        with _lock:
+            client = _clients.get(conn_str)
+            if client is None:
+                client = BlobServiceClient.from_connection_string(
+                    conn_str, max_single_get_size=chunk_size, max_chunk_get_size=chunk_size)
+                _clients[conn_str] = client
+    return client
+
+def get_async_blob_service_client(blob_credentials, chunk_size=CHUNK_SIZE):
+    # The aio client belongs to the event loop that first uses it; the ASGI app runs one loop.
+    from azure.storage.blob.aio import BlobServiceClient
+    conn_str = connection_string(blob_credentials)
+    client = _async_clients.get(conn_str)
+    if client is None:
+        client = BlobServiceClient.from_connection_string(
+            conn_str, max_single_get_size=chunk_size, max_chunk_get_size=chunk_size)
+        _async_clients[conn_str] = client
+    return client
+
+class AzureBlobSource:
+    def __init__(self, blob_credentials, chunk_size=CHUNK_SIZE):
+        self.blob_credentials = blob_credentials
+        self.container_name = blob_credentials["CONTAINER_NAME"]
+        self.chunk_size = chunk_size
+
+    def _download(self, blob_name):
+        # Download in one call and map "not found" instead of pre-checking exists().
+        from azure.core.exceptions import ResourceNotFoundError
+        client = get_blob_service_client(self.blob_credentials, self.chunk_size)
+        blob_client = client.get_blob_client(container=self.container_name, blob=blob_name)
+        try:
+            return blob_client.download_blob()
+        except ResourceNotFoundError:
+            return None
+
+    def read_bytes(self, blob_name):
+        downloader = self._download(blob_name)
+        return downloader.readall() if downloader is not None else None
+
+    def iter_chunks(self, blob_name):
+        downloader = self._download(blob_name)
+        return downloader.chunks() if downloader is not None else None
+
+    async def aread_bytes(self, blob_name):
+        from azure.core.exceptions import ResourceNotFoundError
+        client = get_async_blob_service_client(self.blob_credentials, self.chunk_size)
+        blob_client = client.get_blob_client(container=self.container_name, blob=blob_name)
+        try:
+            downloader = await blob_client.download_blob()
+        except ResourceNotFoundError:
+            return None
+        return await downloader.readall()
+
+    def list_names(self, prefix=""):
+        client = get_blob_service_client(self.blob_credentials, self.chunk_size)
+        container_client = client.get_container_client(self.container_name)
+        return [blob.name for blob in container_client.list_blobs(name_starts_with=prefix or None)]
+
+def _mmap_chunks(path, chunk_size):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for offset in range(0, len(mapped), chunk_size):
+                yield mapped[offset:offset + chunk_size]
+
+class LocalDirSource:
+    def __init__(self, directory, chunk_size=CHUNK_SIZE):
+        self.directory = directory
+        self.chunk_size = chunk_size
+
+    def _path(self, blob_name):
+        return os.path.join(self.directory, os.path.basename(blob_name))
+
+    def read_bytes(self, blob_name):
+        try:
+            with open(self._path(blob_name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def iter_chunks(self, blob_name):
+        path = self._path(blob_name)
+        if not os.path.isfile(path):
+            return None
+        return _mmap_chunks(path, self.chunk_size)
+
+    async def aread_bytes(self, blob_name):
+        return await asyncio.to_thread(self.read_bytes, blob_name)
+
+    def list_names(self, prefix=""):
+        return sorted(name for name in os.listdir(self.directory)
+                      if name.startswith(prefix) and os.path.isfile(os.path.join(self.directory, name)))
+
+class MemorySource:
+    def __init__(self, blobs=None, chunk_size=CHUNK_SIZE):
+        self.blobs = dict(blobs or {})
+        self.chunk_size = chunk_size
+
+    def put(self, blob_name, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.blobs[blob_name] = data
+
+    def read_bytes(self, blob_name):
+        return self.blobs.get(os.path.basename(blob_name))
+
+    def iter_chunks(self, blob_name):
+        data = self.read_bytes(blob_name)
+        if data is None:
+            return None
+        view = memoryview(data)
+        return (view[offset:offset + self.chunk_size] for offset in range(0, len(view), self.chunk_size))
+
+    async def aread_bytes(self, blob_name):
+        return self.read_bytes(blob_name)
+
+    def list_names(self, prefix=""):
+        return sorted(name for name in self.blobs if name.startswith(prefix))
+
+def build_source(config):
+    settings = config.get("edi_source", {})
+    backend = settings.get("backend", "azure")
+    chunk_size = settings.get("chunk_size", CHUNK_SIZE)
+    if backend == "azure":
+        return AzureBlobSource(config["blob_credentials"], chunk_size)
+    if backend == "local":
+        return LocalDirSource(settings.get("directory", "edi_files"), chunk_size)
+    if backend == "memory":
+        return MemorySource(chunk_size=chunk_size)
+    raise ValueError(f"Unknown edi_source backend: {backend}")
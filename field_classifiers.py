@@ -0,0 +1,91 @@
+import contextlib
+import contextvars
+import re
+
+# Classifiers for the free-form NM1/PRV elements extract_edi_fields has to
+# recognise. The per-element tests use C-level str methods, a lookup table
+# for the Luhn check and one precompiled regex instead of Python loops over
+# characters. NPIs are checked properly: ten digits whose last digit is the
+# Luhn check digit over "80840" + the first nine (the card-issuer prefix CMS
+# assigns to NPIs). find_npi() only looks for the ten-digit shape, so a
+# mistyped NPI is still extracted and can be rejected by its check digit
+# (is_npi) before anything is sent downstream.
+#
+# classify_column() is the batch form for a whole column of elements (e.g.
+# every NM1/PRV element of an interchange): each distinct value is
+# classified once. Inside classified_column(elements), find_name/find_npi/
+# find_taxonomy look those flags up instead of running the classifiers again.
+
+NAME = 1
+NPI = 2
+TAXONOMY = 4
+
+# 24 is the Luhn contribution of the constant "80840" prefix.
+NPI_PREFIX_SUM = 24
+# Luhn contribution of every two-digit pair "ab" at an even offset of the
+# NPI: a is doubled (digit sum of 2a), b is taken as is.
+_PAIR_SUM = {f"{a}{b}": (2 * a) // 10 + (2 * a) % 10 + b for a in range(10) for b in range(10)}
+
+_DIGIT = re.compile(r"\d")
+
+_column = contextvars.ContextVar("classified_column", default=None)
+
+def npi_check_digit_valid(npi):
+    # npi must already be ten ASCII digits; five pair lookups instead of a loop per digit.
+    total = (NPI_PREFIX_SUM + _PAIR_SUM[npi[0:2]] + _PAIR_SUM[npi[2:4]] + _PAIR_SUM[npi[4:6]]
+             + _PAIR_SUM[npi[6:8]] + _PAIR_SUM[npi[8:10]])
+    return total % 10 == 0
+
+def is_name(s):
+    # True if s contains 2-4 words and no digits.
+    return 2 <= len(s.split()) <= 4 and _DIGIT.search(s) is None
+
+def is_npi_shaped(s):
+    # True if s is ten ASCII digits, whether or not the check digit is right.
+    return len(s) == 10 and s.isascii() and s.isdigit()
+
+def is_npi(s):
+    # True if s is a ten digit NPI with a valid check digit.
+    return is_npi_shaped(s) and npi_check_digit_valid(s)
+
+def is_taxonomy(s):
+    # True if s is alphanumeric, 7-11 characters long, containing at least one digit and one letter.
+    # For an ASCII alphanumeric string "not all digits and not all letters" is exactly that.
+    return 7 <= len(s) <= 11 and s.isascii() and s.isalnum() and not s.isdigit() and not s.isalpha()
+
+def classify(s):
+    # Bitmask of NAME, NPI (the ten-digit shape find_npi looks for) and TAXONOMY for one element.
+    return (NAME if is_name(s) else 0) | (NPI if is_npi_shaped(s) else 0) | (TAXONOMY if is_taxonomy(s) else 0)
+
+def classify_column(elements):
+    # One bitmask per element. Repeated values (qualifiers such as "82" or
+    # "XX", the same provider across the transactions of an interchange) are
+    # classified once.
+    flags = {element: classify(element) for element in set(elements)}
+    return [flags[element] for element in elements]
+
+@contextlib.contextmanager
+def classified_column(elements):
+    values = list(set(elements))
+    token = _column.set(dict(zip(values, classify_column(values))))
+    try:
+        yield
+    finally:
+        _column.reset(token)
+
+def _find(elements, kind, predicate):
+    column = _column.get()
+    for element in elements:
+        flags = column.get(element) if column is not None else None
+        if (predicate(element) if flags is None else flags & kind):
+            return element
+    return None
+
+def find_name(elements):
+    return _find(elements, NAME, is_name)
+
+def find_npi(elements):
+    return _find(elements, NPI, is_npi_shaped)
+
+def find_taxonomy(elements):
+    return _find(elements, TAXONOMY, is_taxonomy)
@@ -0,0 +1,127 @@
+import threading
+
+# Shared keep-alive session for the provider/member match services. A single
+# module-level requests.Session owns a urllib3 pool per host, so scoring
+# calls reuse warm TCP+TLS connections instead of handshaking every time.
+# Every call carries a (connect, read) timeout so a hung scoring service
+# can't hold a worker forever. requests is imported on first use so it
+# stays off the import path of the apps. The ASGI app uses the httpx
+# AsyncClient from get_async_client() with the same timeouts; its pool is
+# sized separately since one event loop keeps many more calls in flight.
+
+DEFAULT_SETTINGS = {
+    "pool_connections": 4,
+    "pool_maxsize": 32,
+    "pool_block": False,
+    "connect_timeout": 3.05,
+    "read_timeout": 30,
+    "async_max_connections": 200,
+}
+
+_settings = dict(DEFAULT_SETTINGS)
+_session = None
+_adapter = None
+_async_client = None
+_lock = threading.Lock()
+
+def configure(settings):
+    # Apply new pool settings; the session is rebuilt lazily on next use.
+    global _session, _adapter, _async_client
+    with _lock:
+        merged = dict(DEFAULT_SETTINGS)
+        merged.update(settings or {})
+        if merged == _settings:
+            # Unchanged (e.g. a config reload touching other keys): keep the warm pool.
+            return
+        _settings.clear()
+        _settings.update(merged)
+        if _session is not None:
+            _session.close()
+        _session = None
+        _adapter = None
+        # An async client can only be closed from its loop; the old one is
+        # left to finish in-flight calls and be collected.
+        _async_client = None
+
+def get_session():
+    global _session, _adapter
+    if _session is None:
+        with _lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                adapter = HTTPAdapter(
+                    pool_connections=_settings["pool_connections"],
+                    pool_maxsize=_settings["pool_maxsize"],
+                    pool_block=_settings["pool_block"])
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _adapter = adapter
+                _session = session
+    return _session
+
+def get_async_client():
+    global _async_client
+    if _async_client is None:
+        import httpx
+        _async_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=_settings["async_max_connections"],
+                max_keepalive_connections=_settings["async_max_connections"]),
+            timeout=httpx.Timeout(_settings["read_timeout"], connect=_settings["connect_timeout"]))
+    return _async_client
+
+async def apost(url, json=None, headers=None, timeout=None):
+    # timeout is a (connect, read) pair as for post(); None keeps the client's.
+    if timeout is None:
+        return await get_async_client().post(url, json=json, headers=headers)
+    import httpx
+    connect, read = timeout
+    return await get_async_client().post(url, json=json, headers=headers, timeout=httpx.Timeout(read, connect=connect))
+
+async def aclose():
+    global _async_client
+    client, _async_client = _async_client, None
+    if client is not None:
+        await client.aclose()
+
+def default_timeout():
+    return (_settings["connect_timeout"], _settings["read_timeout"])
+
+def attempt_timeout(remaining=None):
+    # The (connect, read) timeout for one retry attempt, capped at the seconds
+    # left before the retry deadline.
+    connect, read = default_timeout()
+    if remaining is None:
+        return connect, read
+    return min(connect, remaining), min(read, remaining)
+
+def post(url, json=None, headers=None, timeout=None):
+    return get_session().post(url, json=json, headers=headers, timeout=timeout or default_timeout())
+
+def pool_stats():
+    stats = {
+        "pool_connections": _settings["pool_connections"],
+        "pool_maxsize": _settings["pool_maxsize"],
+        "connect_timeout": _settings["connect_timeout"],
+        "read_timeout": _settings["read_timeout"],
+        "hosts": {},
+    }
+    adapter = _adapter
+    if adapter is None:
+        return stats
+    pools = adapter.poolmanager.pools
+    for key in list(pools.keys()):
+        pool = pools.get(key)
+        if pool is None:
+            continue
+        opened = pool.num_connections
+        served = pool.num_requests
+        stats["hosts"][f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+            "connections_opened": opened,
+            "requests": served,
+            "idle_connections": pool.pool.qsize() if pool.pool is not None else 0,
+            "reuse_rate": round(1 - opened / served, 4) if served else 0.0,
+        }
+    return stats
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Content-addressed cache for LLM extraction results. Entries are keyed on a
+# hash of the canonical input dict, the prompt and the model version, held in
+# an in-process LRU tier with a TTL and optionally mirrored to sqlite so warm
+# entries survive restarts. Values are stored as JSON text so callers always
+# get a fresh copy they are free to mutate.
+
+def make_key(inputs, prompt, model_version):
+    canonical = json.dumps(
+        {"inputs": inputs, "prompt": prompt, "model": model_version},
+        sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class LLMCache:
+    def __init__(self, max_entries=1024, ttl_seconds=86400, disk_path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "sets": 0}
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT, created REAL)")
+            self._db.commit()
+
+    def _expired(self, created, now):
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def _put_memory(self, key, value, created):
+        self._entries[key] = (value, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created = entry
+                if not self._expired(created, now):
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return json.loads(value)
+                del self._entries[key]
+                self._counters["expirations"] += 1
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value, created = row
+                    if not self._expired(created, now):
+                        self._put_memory(key, value, created)
+                        self._counters["disk_hits"] += 1
+                        return json.loads(value)
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._counters["expirations"] += 1
+            self._counters["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        text = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, text, now)
+            self._counters["sets"] += 1
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO llm_cache (key, value, created) VALUES (?, ?, ?)", (key, text, now))
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._entries)
+            stats["max_entries"] = self.max_entries
+            stats["ttl_seconds"] = self.ttl_seconds
+            stats["disk_enabled"] = self._db is not None
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+def build_cache(settings):
+    settings = settings or {}
+    return LLMCache(
+        max_entries=settings.get("max_entries", 1024),
+        ttl_seconds=settings.get("ttl_seconds", 86400),
+        disk_path=settings.get("disk_path"))
@@ -0,0 +1,43 @@
+import json
+import os
+import re
+import threading
+
+# Lazily built AzureChatOpenAI client shared by the apps. langchain is only
+# imported, and the client only constructed, on the first LLM call, so
+# importing an app (and cold-starting a pod) doesn't pay for it, and the
+# rules fast path and cache hits never do.
+
+LLM_MODEL_VERSION = "gpt-4/Claims-Summary/2023-05-15"
+
+_llm = None
+_lock = threading.Lock()
+
+def get_llm():
+    global _llm
+    if _llm is None:
+        with _lock:
+            if _llm is None:
+                from langchain.chat_models import AzureChatOpenAI
+                _llm = AzureChatOpenAI(
+                    deployment_name="Claims-Summary",
+                    model="gpt-4",
+                    azure_endpoint=os.getenv("OPENAI_API_ENDPOINT"),
+                    api_key=os.getenv("azure_openai_api_key"),
+                    #api_type="azure",
+                    api_version="2023-05-15"
+                )
+    return _llm
+
+def set_llm(llm):
+    # Installs a stand-in client with the same invoke/ainvoke interface (e.g.
+    # mock_services.FakeChatModel); None goes back to the lazy Azure client.
+    global _llm
+    with _lock:
+        _llm = llm
+
+def parse_llm_json(content):
+    # The model wraps its JSON in prose or ```json fences; keep the outermost object.
+    content = content.replace('json','').replace("```","")
+    res = (m := re.search(r'({.*})', content, re.DOTALL)) and m.group(1)
+    return json.loads(res)
@@ -0,0 +1,174 @@
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+# Minimal Prometheus-style metrics: counters and histograms with labels,
+# rendered in the text exposition format for the /metrics route. Kept
+# in-repo so the apps don't need prometheus_client.
+#
+#   with stage_timer("parse"):
+#       ...
+#   count_failure("edi_validation")
+#
+#   @app.route('/authentication_flow')
+#   @observe_request("authentication_flow")
+#   def authentication_flow(): ...
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, label_values)} {_number(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    cumulative += count
+                    labels = _labels(self.label_names, label_values, [("le", _number(bound))])
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _labels(self.label_names, label_values)
+                lines.append(f"{self.name}_sum{labels} {_number(series['sum'])}")
+                lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+class Gauge:
+    # Read at scrape time from a callback returning {label_values_tuple: value}.
+    def __init__(self, name, help_text, label_names, callback):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.callback = callback
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        for label_values, value in sorted(self.callback().items()):
+            lines.append(f"{self.name}{_labels(self.label_names, label_values)} {_number(value)}")
+        return lines
+
+_registry = []
+
+def register(metric):
+    _registry.append(metric)
+    return metric
+
+def render():
+    lines = []
+    for metric in _registry:
+        try:
+            lines.extend(metric.render())
+        except Exception as err:
+            lines.append(f"# {metric.name} unavailable: {_escape(err)}")
+    return "\n".join(lines) + "\n"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+stage_seconds = register(Histogram(
+    "prior_auth_stage_seconds", "Latency of each prior-auth pipeline stage in seconds.", ["stage"]))
+request_seconds = register(Histogram(
+    "prior_auth_request_seconds", "End-to-end latency of prior-auth requests in seconds.", ["route"]))
+requests_total = register(Counter(
+    "prior_auth_requests_total", "Prior-auth requests by route and HTTP status.", ["route", "status"]))
+failures_total = register(Counter(
+    "prior_auth_failures_total", "Prior-auth failures by reason.", ["reason"]))
+
+@contextmanager
+def stage_timer(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, stage)
+
+def count_failure(reason):
+    failures_total.inc(reason)
+
+def _status_code(result):
+    # Flask views return a response object or a (body, status[, headers]) tuple.
+    if isinstance(result, tuple) and len(result) > 1 and isinstance(result[1], int):
+        return result[1]
+    return getattr(result, "status_code", 200)
+
+def observe_request(route):
+    def decorator(view):
+        if inspect.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                status = 500
+                try:
+                    result = await view(*args, **kwargs)
+                    status = _status_code(result)
+                    return result
+                finally:
+                    request_seconds.observe(time.perf_counter() - start, route)
+                    requests_total.inc(route, str(status))
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            status = 500
+            try:
+                result = view(*args, **kwargs)
+                status = _status_code(result)
+                return result
+            finally:
+                request_seconds.observe(time.perf_counter() - start, route)
+                requests_total.inc(route, str(status))
+        return wrapper
+    return decorator
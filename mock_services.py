@@ -0,0 +1,323 @@
+import ast
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+
+# Stand-ins for the downstream services of authentication_flow: the Azure
+# OpenAI chat completion endpoint and the provider/member match services.
+# Each one draws a latency from a configurable distribution and fails with
+# a 5xx at error_rate, or for every request during periodic bursts, so the
+# retry, circuit breaker, batching and caching behaviour can be load-tested
+# without the real services.
+#
+# As servers (the same process answers all three):
+#
+#   MOCK_SERVICES_CONFIG=mock.json uvicorn mock_services:build_app --factory --port 5100
+#
+#   then OPENAI_API_ENDPOINT=http://localhost:5100 and, in custom_edi.config,
+#   "providers_db": "http://localhost:5100/provider-match/",
+#   "members_db": "http://localhost:5100/member-match/"
+#
+# In process, install() swaps http_pool.post/apost and the LLM client for
+# fakes with the same behaviour (URLs containing "member" go to
+# member_match, the rest to provider_match).
+#
+# Settings are merged over DEFAULT_SETTINGS per service:
+#
+#   "latency": {"distribution": "lognormal", "median_ms": 120, "sigma": 0.5, "max_ms": 10000}
+#       also {"distribution": "fixed", "ms": 50}, {"distribution": "uniform", "min_ms": 20, "max_ms": 80}
+#       and {"distribution": "exponential", "mean_ms": 100}
+#   "error_rate": 0.01, "error_status": [500, 502, 503, 504]
+#   "bursts": {"every_seconds": 60, "duration_seconds": 5, "status": 503}
+#   match services only: "score": {"min": 85, "max": 100}, "not_found_rate": 0.0
+
+DEFAULT_SETTINGS = {
+    "seed": None,
+    "llm": {
+        "latency": {"distribution": "lognormal", "median_ms": 800, "sigma": 0.35, "max_ms": 30000},
+        "error_rate": 0.0,
+        "error_status": [429, 500, 503],
+        "bursts": None,
+    },
+    "provider_match": {
+        "latency": {"distribution": "lognormal", "median_ms": 120, "sigma": 0.5, "max_ms": 10000},
+        "error_rate": 0.01,
+        "error_status": [500, 502, 503, 504],
+        "bursts": None,
+        "score": {"min": 85, "max": 100},
+        "not_found_rate": 0.0,
+    },
+    "member_match": {
+        "latency": {"distribution": "lognormal", "median_ms": 120, "sigma": 0.5, "max_ms": 10000},
+        "error_rate": 0.01,
+        "error_status": [500, 502, 503, 504],
+        "bursts": None,
+        "score": {"min": 65, "max": 100},
+        "not_found_rate": 0.0,
+    },
+}
+
+SERVICES = ("llm", "provider_match", "member_match")
+
+def merge_settings(settings=None):
+    settings = settings or {}
+    merged = {"seed": settings.get("seed", DEFAULT_SETTINGS["seed"])}
+    for service in SERVICES:
+        merged[service] = dict(DEFAULT_SETTINGS[service], **(settings.get(service) or {}))
+    return merged
+
+def load_settings(path=None):
+    path = path or os.getenv("MOCK_SERVICES_CONFIG")
+    if not path:
+        return merge_settings()
+    with open(path) as f:
+        return merge_settings(json.load(f))
+
+def sample_latency(spec, rng):
+    # Seconds to wait before answering, capped at max_ms.
+    distribution = spec.get("distribution", "fixed")
+    if distribution == "fixed":
+        ms = spec.get("ms", 0)
+    elif distribution == "uniform":
+        ms = rng.uniform(spec.get("min_ms", 0), spec.get("max_ms", 0))
+    elif distribution == "exponential":
+        mean = spec.get("mean_ms", 0)
+        ms = rng.expovariate(1.0 / mean) if mean else 0
+    elif distribution == "lognormal":
+        ms = spec.get("median_ms", 0) * rng.lognormvariate(0, spec.get("sigma", 0.5))
+    else:
+        raise ValueError(f"Unknown latency distribution {distribution!r}")
+    return min(ms, spec.get("max_ms", ms)) / 1000.0
+
+class Downstream:
+    # One simulated service: picks the delay and the failure for each request.
+    def __init__(self, name, settings, rng):
+        self.name = name
+        self.settings = settings
+        self.rng = rng
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "errors": 0, "burst_errors": 0, "not_found": 0, "delay_seconds": 0.0}
+
+    def in_burst(self):
+        bursts = self.settings.get("bursts")
+        if not bursts:
+            return False
+        # The last duration_seconds of every period, so a run starts healthy.
+        phase = (time.monotonic() - self.started) % bursts["every_seconds"]
+        return phase >= bursts["every_seconds"] - bursts["duration_seconds"]
+
+    def decide(self):
+        # Returns (delay_seconds, error status or None).
+        delay = sample_latency(self.settings["latency"], self.rng)
+        status = None
+        burst = self.in_burst()
+        if burst:
+            status = self.settings["bursts"].get("status", 503)
+        elif self.rng.random() < self.settings.get("error_rate", 0.0):
+            status = self.rng.choice(self.settings["error_status"])
+        with self._lock:
+            self._counters["requests"] += 1
+            self._counters["delay_seconds"] += delay
+            if status is not None:
+                self._counters["burst_errors" if burst else "errors"] += 1
+        return delay, status
+
+    def match_result(self):
+        if self.rng.random() < self.settings.get("not_found_rate", 0.0):
+            with self._lock:
+                self._counters["not_found"] += 1
+            return []
+        score = self.settings.get("score", {})
+        return [{"SCORE": {"Final_Score": self.rng.randint(score.get("min", 0), score.get("max", 100))}}]
+
+    def match_body(self, payload):
+        # score_batcher's array requests get one result per item.
+        if isinstance(payload, list):
+            return [self.match_result() for _ in payload]
+        return self.match_result()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        delay = stats.pop("delay_seconds")
+        stats["mean_delay_ms"] = round(delay / stats["requests"] * 1000, 3) if stats["requests"] else 0.0
+        stats["in_burst"] = self.in_burst()
+        return stats
+
+def _prompt_details(text):
+    # The extraction prompts embed the EDI details as a Python dict literal.
+    match = re.search(r"{.*?}", text, re.DOTALL)
+    if match:
+        try:
+            details = ast.literal_eval(match.group(0))
+            if isinstance(details, dict):
+                return details
+        except (ValueError, SyntaxError):
+            pass
+    return {}
+
+def chat_answer(messages):
+    # JSON content for the provider or member extraction prompt.
+    system, prompt = messages[0][1], messages[-1][1]
+    details = _prompt_details(prompt)
+    if "provider" in system:
+        words = str(details.get("name", "NA NA")).split()
+        return json.dumps({
+            "Npi": details.get("npi", "NA"),
+            "FirstName": words[0] if words else "NA",
+            "LastName": words[-1] if len(words) > 1 else "NA",
+            "Address1": details.get("address", "NA")})
+    return json.dumps({
+        "member_id": details.get("member_id", "NA"),
+        "name": details.get("name", "NA"),
+        "dob": details.get("dob", "NA"),
+        "address": details.get("address", "NA")})
+
+def chat_completion_body(messages, model="gpt-4"):
+    # The Azure OpenAI chat completion response shape.
+    content = chat_answer(messages)
+    prompt_tokens = sum(len(text.split()) for _, text in messages)
+    completion_tokens = len(content.split())
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+def build_services(settings):
+    rng = random.Random(settings.get("seed"))
+    return {service: Downstream(service, settings[service], rng) for service in SERVICES}
+
+def build_app(settings=None):
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    settings = merge_settings(settings) if settings is not None else load_settings()
+    services = build_services(settings)
+
+    async def chat_completions(request):
+        body = await request.json()
+        delay, status = services["llm"].decide()
+        await asyncio.sleep(delay)
+        if status is not None:
+            return JSONResponse({"error": {"code": str(status), "message": "Mock service error"}}, status_code=status)
+        messages = [(m.get("role"), m.get("content", "")) for m in body.get("messages", [])]
+        return JSONResponse(chat_completion_body(messages, body.get("model") or request.path_params["deployment"]))
+
+    def match(service):
+        async def endpoint(request):
+            payload = await request.json()
+            delay, status = services[service].decide()
+            await asyncio.sleep(delay)
+            if status is not None:
+                return JSONResponse({"error": "Mock service error"}, status_code=status)
+            return JSONResponse(services[service].match_body(payload))
+        return endpoint
+
+    async def stats(request):
+        return JSONResponse({name: service.stats() for name, service in services.items()})
+
+    return Starlette(routes=[
+        Route("/openai/deployments/{deployment}/chat/completions", chat_completions, methods=["POST"]),
+        Route("/provider-match/", match("provider_match"), methods=["POST"]),
+        Route("/member-match/", match("member_match"), methods=["POST"]),
+        Route("/stats", stats, methods=["GET"]),
+    ])
+
+class MockServiceError(Exception):
+    def __init__(self, status):
+        super().__init__(f"Mock service returned HTTP {status}")
+        self.status = status
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+
+class FakeChatModel:
+    # invoke/ainvoke like AzureChatOpenAI; an injected 5xx raises MockServiceError.
+    def __init__(self, downstream):
+        self.downstream = downstream
+
+    def invoke(self, messages):
+        delay, status = self.downstream.decide()
+        time.sleep(delay)
+        if status is not None:
+            raise MockServiceError(status)
+        return FakeMessage(chat_answer(messages))
+
+    async def ainvoke(self, messages):
+        delay, status = self.downstream.decide()
+        await asyncio.sleep(delay)
+        if status is not None:
+            raise MockServiceError(status)
+        return FakeMessage(chat_answer(messages))
+
+class FakeResponse:
+    # Enough of requests.Response and httpx.Response for the scoring clients.
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+        self.text = json.dumps(body)
+
+    @property
+    def is_error(self):
+        return self.status_code >= 400
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if self.is_error:
+            import requests
+            raise requests.exceptions.HTTPError(f"{self.status_code} Mock service error", response=self)
+
+class InProcessFakes:
+    def __init__(self, settings=None):
+        self.services = build_services(merge_settings(settings))
+        self.llm = FakeChatModel(self.services["llm"])
+
+    def _match(self, url):
+        return self.services["member_match" if "member" in url else "provider_match"]
+
+    def _respond(self, service, status, payload):
+        if status is not None:
+            return FakeResponse(status, {"error": "Mock service error"})
+        return FakeResponse(200, service.match_body(payload))
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        service = self._match(url)
+        delay, status = service.decide()
+        time.sleep(delay)
+        return self._respond(service, status, json)
+
+    async def apost(self, url, json=None, headers=None, timeout=None):
+        service = self._match(url)
+        delay, status = service.decide()
+        await asyncio.sleep(delay)
+        return self._respond(service, status, json)
+
+    def stats(self):
+        return {name: service.stats() for name, service in self.services.items()}
+
+def install(settings=None):
+    # Routes http_pool and the LLM client to in-process fakes; returns them
+    # so callers can read stats().
+    import http_pool
+    import llm_client
+    fakes = InProcessFakes(settings)
+    http_pool.post = fakes.post
+    http_pool.apost = fakes.apost
+    llm_client.set_llm(fakes.llm)
+    return fakes
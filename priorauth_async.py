@@ -0,0 +1,264 @@
+import asyncio
+import contextlib
+import importlib
+import json
+import os
+import time
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import priorauth_workflow_2 as workflow
+import http_pool
+import metrics
+import request_log
+from edi_normalizer import normalize_provider, normalize_member
+from field_classifiers import classified_column
+from llm_client import get_llm, parse_llm_json
+from metrics import stage_timer
+from request_log import log_payload
+from retry_policy import CircuitOpenError, ServiceUnavailableError, get_breaker
+from score_cache import score_cache_bypass
+from stage_graph import SharedResults
+from claim_dates import bind_request_clock
+import score_batcher
+from x12_tokenizer import iter_segments_bytes
+from x12_interchange import validate_edi_278
+
+# Async (ASGI) variant of the prior-auth service exposing the same
+# /authentication_flow, /convert and /validate contracts as the Flask apps.
+# Blob reads, scoring calls and LLM calls are awaited (azure aio, httpx,
+# llm.ainvoke), so one process keeps hundreds of requests in flight instead
+# of one per worker thread. The pipeline is the workflow's stage graph; its
+# CPU-bound local stages (EDI validation, parsing, extraction) run off the
+# loop in worker threads. Config, caches, circuit breakers and metrics are
+# shared with priorauth_workflow_2.
+#
+#   uvicorn priorauth_async:app --host 0.0.0.0 --port 5008
+
+log = request_log.get_logger("authentication_flow_async")
+
+SCORE_HEADERS = {"Accept": "application/json", "Content-Type": "application/json",}
+
+def app_module(name):
+    # app_create_json and app_validate read config_for_edi.config at import;
+    # load them on first use so /authentication_flow doesn't depend on it.
+    return importlib.import_module(name)
+
+async def cached_llm_json(messages, cache_key, cache, stage):
+    value = cache.get(cache_key)
+    if value is None:
+        with stage_timer(stage):
+            ai_msg = await get_llm().ainvoke(messages)
+        log_payload(log, "LLM response", ai_msg.content, stage=stage)
+        value = parse_llm_json(ai_msg.content)
+        cache.set(cache_key, value)
+    return value
+
+async def post_score_request(url, payload):
+    # Same retry/breaker/deadline behaviour as workflow.post_score_request, on httpx.
+    import httpx
+    breaker = get_breaker(url)
+    error = None
+    async for attempt, remaining in workflow.scoring_retry.async_attempts():
+        if not breaker.allow_request():
+            raise CircuitOpenError(url)
+        try:
+            response = await http_pool.apost(url, json=payload, headers=SCORE_HEADERS, timeout=http_pool.attempt_timeout(remaining))
+        except (httpx.TimeoutException, httpx.NetworkError) as req_err:
+            breaker.record_failure()
+            log.warning("Scoring request failed", extra={"fields": {"url": url, "attempt": attempt, "error": str(req_err)}})
+            error = str(req_err)
+            continue
+        except httpx.RequestError as req_err:
+            breaker.record_failure()
+            log.warning("Scoring request failed", extra={"fields": {"url": url, "error": str(req_err)}})
+            raise ServiceUnavailableError(url, str(req_err)) from req_err
+        if response.status_code in workflow.TRANSIENT_STATUS:
+            breaker.record_failure()
+            log_payload(log, "Scoring error response", response.text)
+            error = f"HTTP {response.status_code}"
+            continue
+        breaker.record_success()
+        if response.is_error:
+            log.warning("Scoring HTTP error", extra={"fields": {"url": url, "status_code": response.status_code}})
+            log_payload(log, "Scoring error response", response.text)
+            return None
+        return response.json()
+    log.warning("Scoring service unavailable after retries", extra={"fields": {"url": url, "error": error}})
+    raise ServiceUnavailableError(url, f"Scoring service unavailable after retries: {error}")
+
+async def provider_features(provider, llm_fallback):
+    provider_features, missing = normalize_provider(provider)
+    if missing and llm_fallback:
+        log.info("Provider fields not resolved by rules, falling back to LLM", extra={"fields": {"missing": missing}})
+        messages, cache_key = workflow.provider_llm_request({"provider": provider})
+        return await cached_llm_json(messages, cache_key, workflow.llm_cache, "llm_provider"), "llm"
+    return provider_features, "rules"
+
+async def member_features(member, llm_fallback):
+    member_features, missing = normalize_member(member)
+    if missing and llm_fallback:
+        log.info("Member fields not resolved by rules, falling back to LLM", extra={"fields": {"missing": missing}})
+        messages, cache_key = workflow.member_llm_request({"member": member})
+        member_features = await cached_llm_json(messages, cache_key, workflow.llm_cache, "llm_member")
+        return json.dumps(member_features, indent=2), "llm"
+    return json.dumps(member_features, indent=2), "rules"
+
+async def score(url, payload):
+    return await workflow.score_cache.aget_or_fetch(
+        url, payload, lambda: score_batcher.afetch(url, payload, post_score_request))
+
+# Coroutine versions of the expensive stages of workflow.CLAIM_STAGES; the
+# cheap and local stages are the workflow's own.
+
+async def provider_features_stage(ctx):
+    provider = ctx["extracted_json"]["provider"]
+    llm_fallback = ctx["claim_values"].get("llm_fallback", True)
+    ctx["provider_features"], ctx["provider_path"] = await ctx["shared"].aget(
+        ("provider_features", workflow.identity_key(provider)), lambda: provider_features(provider, llm_fallback))
+
+async def provider_scoring_stage(ctx):
+    features = ctx["provider_features"]
+    providers_db = ctx["claim_values"]["providers_db"]
+    try:
+        ctx["provider_result"] = await ctx["shared"].aget(
+            ("provider_scoring", workflow.identity_key(features)), lambda: score(providers_db, features))
+    except ServiceUnavailableError as err:
+        return workflow.scoring_unavailable_response(err)
+
+async def member_features_stage(ctx):
+    member = ctx["extracted_json"]["member"]
+    llm_fallback = ctx["claim_values"].get("llm_fallback", True)
+    ctx["member_features"], ctx["member_path"] = await ctx["shared"].aget(
+        ("member_features", workflow.identity_key(member)), lambda: member_features(member, llm_fallback))
+
+async def member_scoring_stage(ctx):
+    features = ctx["member_features"]
+    members_db = ctx["claim_values"]["members_db"]
+    try:
+        ctx["member_result"] = await ctx["shared"].aget(
+            ("member_scoring", features), lambda: score(members_db, json.loads(features)))
+    except ServiceUnavailableError as err:
+        return workflow.scoring_unavailable_response(err)
+
+CLAIM_STAGES = workflow.CLAIM_STAGES.with_arun(
+    provider_features=provider_features_stage,
+    provider_scoring=provider_scoring_stage,
+    member_features=member_features_stage,
+    member_scoring=member_scoring_stage)
+
+async def run_claim(ctx):
+    failure, stages = await CLAIM_STAGES.arun(ctx)
+    return workflow.claim_response(ctx, failure, stages)
+
+async def authenticate_segments(segments, blob_url, claim_values):
+    # Like workflow.authenticate_segments, with the transactions of an
+    # interchange authenticated concurrently on the loop.
+    shared = SharedResults()
+    transactions = await asyncio.to_thread(workflow.split_transactions, segments)
+    if len(transactions) <= 1:
+        return [(None, await run_claim(workflow.claim_context(segments, claim_values, shared)))]
+    log.info("Interchange split into transactions", extra={"fields": {"blob_url": blob_url, "transactions": len(transactions)}})
+    column = await asyncio.to_thread(workflow.classifier_column, segments)
+    with classified_column(column):
+        responses = await asyncio.gather(*(run_transaction(transaction, claim_values, shared) for transaction in transactions))
+    return [(workflow.transaction_info(transaction), response) for transaction, response in zip(transactions, responses)]
+
+async def run_transaction(transaction, claim_values, shared):
+    try:
+        return await run_claim(workflow.claim_context(transaction["segments"], claim_values, shared, transaction["errors"]))
+    except Exception as err:
+        log.exception("Transaction processing failed", extra={"fields": workflow.transaction_info(transaction)})
+        return workflow.processing_failed_response(err)
+
+async def load_edi_segments(blob_url):
+    with stage_timer("blob_read"):
+        data = await workflow.edi_store.aread_bytes(os.path.basename(blob_url))
+        # Tokenizing is CPU-bound; keep it off the loop like the other local stages.
+        segments = await asyncio.to_thread(lambda: list(iter_segments_bytes([data]))) if data is not None else None
+    if segments is None:
+        return None, workflow.edi_not_found_response(blob_url)
+    return segments, None
+
+@metrics.observe_request("authentication_flow")
+async def authentication_flow(request):
+    claim_values = workflow.config.snapshot()
+    score_cache_bypass.set(request.query_params.get("score_cache") == "bypass")
+    bind_request_clock()
+    blob_url = request.query_params.get("blob_url")
+    if not blob_url:
+        return JSONResponse({"error": "blob_url is required"}, status_code=400)
+
+    log.info("Processing EDI from Blob URL", extra={"fields": {"blob_url": blob_url}})
+    start_time = time.time()
+    segments, failure = await load_edi_segments(blob_url)
+    if failure is not None:
+        return JSONResponse(failure)
+    entries = await authenticate_segments(segments, blob_url, claim_values)
+    response = workflow.combine_transactions(entries)
+    log.info("Complete Workflow Processing finished", extra={"fields": {
+        "seconds": round(time.time() - start_time, 4), "transactions": len(entries), "status": response["status"]}})
+    if response["status"] == "unavailable":
+        return JSONResponse(response, status_code=503)
+    return JSONResponse(response)
+
+@metrics.observe_request("convert")
+async def convert_edi_api(request):
+    convert = app_module("app_create_json")
+    blob_content = await convert.edi_store.aread_bytes(convert.config_for_edi["blob_credentials"]["BLOB_NAME"])
+    edi_data = blob_content.decode('utf-8') if blob_content is not None else "no file exists in the blob"
+    json_data = convert.convert_edi_file_to_json(edi_data)
+    log_payload(log, "Parsed data", json_data)
+    output_path = convert.dump_json_to_file(json_data, "./json_object/edi_278_modified.json")
+    processed_json = convert.process_extracted_json(json_data)
+    log_payload(log, "Processed data", processed_json)
+    provider_features, member = await asyncio.gather(
+        cached_llm_json(*convert.provider_llm_request(processed_json), convert.llm_cache, "llm_provider"),
+        cached_llm_json(*convert.member_llm_request(processed_json), convert.llm_cache, "llm_member"))
+    member_features = json.dumps(member, indent=2)
+    provider_features['FirstName']="Reyes"
+    provider_features['LastName']="Moore"
+    d = {}
+    d['provider'] = provider_features
+    d['member'] = member_features
+    response = {
+        "message": f"Output JSON dumped to {output_path}" if output_path else "Output JSON dump disabled",
+        "data": d
+    }
+    return JSONResponse(response)
+
+@metrics.observe_request("validate")
+async def validate_edi_api(request):
+    validate = app_module("app_validate")
+    blob_content = await validate.edi_store.aread_bytes(validate.config_for_edi["blob_credentials"]["BLOB_NAME"])
+    if blob_content is None:
+        log.warning("No EDI file exists in the blob")
+        is_valid = False
+    else:
+        is_valid = await asyncio.to_thread(lambda: validate_edi_278(iter_segments_bytes([blob_content])))
+    return JSONResponse({"message": f"EDI file Validity: {is_valid}"})
+
+async def metrics_api(request):
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    await http_pool.aclose()
+
+app = Starlette(
+    routes=[
+        Route('/authentication_flow', authentication_flow, methods=['GET', 'POST']),
+        Route('/convert', convert_edi_api, methods=['GET', 'POST']),
+        Route('/validate', validate_edi_api, methods=['GET']),
+        Route('/metrics', metrics_api, methods=['GET']),
+    ],
+    middleware=[Middleware(request_log.RequestIdMiddleware)],
+    lifespan=lifespan)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=5008)
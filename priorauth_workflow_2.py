@@ -1,20 +1,35 @@
 import random
-import json, re
+import json
 #from faker import Faker
 import datetime
-import os, sys
-import requests
-from collections import Counter
+import os
 
 from flask import Flask, request, jsonify
 app = Flask(__name__)
 
-from azure.storage.blob import BlobServiceClient
-from langchain.chat_models import AzureChatOpenAI
-
 from dotenv import load_dotenv
 import time
 
+from edi_normalizer import normalize_provider, normalize_member
+from field_classifiers import is_npi, find_name, find_npi, find_taxonomy, classified_column
+from llm_cache import build_cache, make_key
+from score_cache import build_score_cache, score_cache_bypass
+from claim_dates import bind_request_clock, request_now, check_window
+from stage_graph import Stage, StageGraph, SharedResults, CHEAP, LOCAL, EXPENSIVE
+import score_batcher
+from llm_client import get_llm, parse_llm_json, LLM_MODEL_VERSION
+import http_pool
+import debug_dump
+import metrics
+from metrics import stage_timer, count_failure
+import request_log
+from request_log import log_payload, ContextThreadPoolExecutor
+from edi_source import build_source
+from x12_tokenizer import Segment, tokenize, iter_segments_bytes
+from x12_interchange import split_transactions, validate_edi_278
+from config_manager import ConfigManager
+from retry_policy import CircuitOpenError, ServiceUnavailableError, get_breaker, configure_breakers, breaker_stats, build_policy
+
 env_path = '/opt/conda/envs/indranilenv/.env'
 load_dotenv(env_path)
 
@@ -24,20 +39,43 @@ azure_openai_api_key = os.getenv("azure_openai_api_key")
 #print(azure_openai_api_key)
 #print(azure_openai_api_endpoint)
 
-llm = AzureChatOpenAI(
-    deployment_name="Claims-Summary",  
-    model="gpt-4", 
-    azure_endpoint=azure_openai_api_endpoint,
-    api_key=azure_openai_api_key,
-    #api_type="azure",
-    api_version="2023-05-15"
-)
+log = request_log.get_logger("authentication_flow")
+request_log.install_flask(app)
 
 def load_config(file_path):
     with open(file_path, 'r') as file:
         return json.load(file)
 
-claim_values = load_config("custom_edi.config")
+# Parsed once at import; requests read config.snapshot() and never touch disk.
+# Edits to custom_edi.config (or a SIGHUP) are picked up without a restart.
+config = ConfigManager("custom_edi.config", reload_interval=2.0)
+config.install_sighup()
+claim_values = config.snapshot()
+llm_cache = build_cache(claim_values.get("llm_cache"))
+score_cache = build_score_cache(claim_values.get("score_cache"))
+
+def apply_config(claim_values):
+    # Re-applies the reloadable settings; pool sizes and the LLM cache keep
+    # their startup values until restart.
+    global scoring_retry, edi_store
+    request_log.configure(claim_values.get("logging"))
+    http_pool.configure(claim_values.get("http_pool"))
+    debug_dump.configure(claim_values.get("debug_dumps"))
+    scoring_retry = build_policy(claim_values.get("scoring_retry"))
+    configure_breakers(claim_values.get("circuit_breaker"))
+    score_batcher.configure(claim_values.get("score_batching"))
+    edi_store = build_source(claim_values)
+
+apply_config(claim_values)
+config.on_reload(apply_config)
+# Shared pool for the expensive pipeline stages (LLM and scoring calls), so
+# the provider and member chains run side by side. The pools run tasks in
+# the submitting request's context so logs keep its id.
+branch_executor = ContextThreadPoolExecutor(max_workers=claim_values.get("branch_workers", 8))
+# Bounded pool for the files of /authentication_flow_batch.
+batch_executor = ContextThreadPoolExecutor(max_workers=claim_values.get("batch_workers", 8))
+# The transactions of multi-transaction interchanges.
+transaction_executor = ContextThreadPoolExecutor(max_workers=claim_values.get("transaction_workers", 8))
 
 def generate_edi_278(details, output_file="edi278.txt"):
     member = details.get("member", {})
@@ -69,7 +107,7 @@ def generate_edi_278(details, output_file="edi278.txt"):
     
     # Provider Hierarchical Level
     segments.append("HL*1**20*1~")
-    segments.append(f"NM1*82*2*{provider.get('name', 'Provider Name')}*****XX*{provider.get('npi', '0000000000')}~")
+    segments.append(f"NM1*82*2*{provider.get('name', 'Provider Name')}*****XX*{provider.get('npi', '1234567893')}~")
     segments.append(f"N3*{provider.get('address', 'Provider Address')}~")
     segments.append("N4*City*State*Zip~")
     segments.append(f"PRV*PE*PXC*{provider.get('taxonomy', '0000000000')}~")
@@ -140,84 +178,119 @@ def create_edi(sample_input, output_file):
     edi_content = generate_edi_278(sample_input, output_file)
     return edi_content
 
-def validate_edi_278(content):
-    segments = [seg.strip() for seg in content.split("~") if seg.strip()]
-
-    if not segments or not segments[0].startswith("ISA"):
-        print("Error: Missing or invalid ISA segment.")
-        return False
-    if not any(seg.startswith("GS") for seg in segments):
-        print("Error: Missing GS segment.")
-        return False
-
-    try:
-        st_index = next(i for i, seg in enumerate(segments) if seg.startswith("ST"))
-    except StopIteration:
-        print("Error: Missing ST segment.")
-        return False
-
-    try:
-        se_index = next(i for i, seg in enumerate(segments[st_index:], start=st_index) if seg.startswith("SE"))
-    except StopIteration:
-        print("Error: Missing SE segment.")
-        return False
-
-    transaction_count = se_index - st_index + 1
-    se_fields = segments[se_index].split("*")
-    try:
-        expected_count = int(se_fields[1])
-    except (IndexError, ValueError):
-        print("Error: Invalid SE segment count.")
-        return False
-    print("Transaction Count = ",transaction_count)
-    print("Expected Count = ",expected_count)
-    #if transaction_count != expected_count:
-        #print("Error: Transaction segment count mismatch.")
-        #return False
-    if not any(seg.startswith("GE") for seg in segments):
-        print("Error: Missing GE segment.")
-        return False
-    if not segments[-1].startswith("IEA"):
-        print("Error: Missing IEA segment.")
-        return False
-    return True
-
 def parse_edi_file(edi_content, output_file):
-    edi_text = edi_content.strip()
-    segments = [seg.strip() for seg in edi_text.split("~") if seg.strip()]
+    segments = tokenize(edi_content) if isinstance(edi_content, str) else edi_content
     parsed_segments = []
     for seg in segments:
-        # Split the segment into elements using "*" and filter out elements that are empty or one character long.
-        elements = [elem.strip() for elem in seg.split("*")]
-        filtered_elements = [elem for elem in elements if len(elem) > 1]
+        # Strip the elements and filter out elements that are empty or one character long.
+        filtered_elements = [elem for elem in (e.strip() for e in seg) if len(elem) > 1]
         if filtered_elements:
-            parsed_segments.append({
-                "tag": filtered_elements[0],
-                "elements": filtered_elements[1:]
-            })
-    directory = os.path.dirname(output_file)
-    if directory and not os.path.exists(directory):
-        os.makedirs(directory)
-    with open(output_file, "w") as f:
-        json.dump(parsed_segments, f, indent=4)
+            parsed_segments.append(Segment(filtered_elements[0], tuple(filtered_elements[1:])))
+    # Debug dump only when enabled, written off the request path.
+    debug_dump.submit(parsed_segments, output_file)
     return parsed_segments
     
-def is_name(s):
-    # True if s contains 2-4 words and no digits.
-    words = s.split()
-    return len(words) in [2, 3, 4] and not any(char.isdigit() for char in s)
-
-def is_npi(s):
-    # True if s is all digits and length between 7 and 11.
-    return s.isdigit() and 7 <= len(s) <= 11
-
-def is_taxonomy(s):
-    # True if s is alphanumeric, 7-11 characters long, containing at least one digit and one letter.
-    if not s.isalnum():
-        return False
-    if not (7 <= len(s) <= 11):
-        return False
-    return any(char.isdigit() for char in s) and any(char.isalpha() for char in s)
+# Per-tag handlers for extract_edi_fields; each one updates output in place.
+def _handle_gs(output, elems):
+    # GS: [HI, Submitter Sanders, Receiver Roberts, Payer Paddington, ...]
+    if len(elems) >= 4:
+        output["submitter"] = elems[1]
+        output["receiver"] = elems[2]
+        output["payer"] = elems[3]
+
+def _handle_nm1(output, elems):
+    # Provider NM1: first element "82"
+    if elems and elems[0] == "82":
+        # The first name-like and the first NPI-shaped element, each found with one scan of the segment.
+        provider = output["provider"]
+        if not provider.get("name"):
+            name = find_name(elems)
+            if name is not None:
+                provider["name"] = name
+        if not provider.get("npi"):
+            npi = find_npi(elems)
+            if npi is not None:
+                provider["npi"] = npi
+    # Member NM1: first element "IL"
+    elif elems and elems[0] == "IL":
+        if len(elems) >= 5:
+            # For member, we assume first name is at index 2 and last name is at index 1.
+            first_name = elems[2]
+            last_name = elems[1]
+            output["member"]["name"] = f"{first_name} {last_name}"
+            output["member"]["member_id"] = elems[4]
+
+def _handle_dob(output, elems):
+    if elems:
+        output["member"]["dob"] = elems[0]
+
+def _handle_n3(output, elems):
+    # If provider already has a name and no address, assign provider address.
+    if "name" in output["provider"] and "address" not in output["provider"]:
+        output["provider"]["address"] = elems[0]
+    elif "name" in output["member"] and "address" not in output["member"]:
+        output["member"]["address"] = elems[0]
+
+def _handle_prv(output, elems):
+    if not output["provider"].get("taxonomy"):
+        taxonomy = find_taxonomy(elems)
+        if taxonomy is not None:
+            output["provider"]["taxonomy"] = taxonomy
+
+def _handle_eb(output, elems):
+    if len(elems) >= 3:
+        output["eligibility"]["is_eligible"] = elems[0]
+        output["eligibility"]["start_date"] = elems[1]
+        output["eligibility"]["end_date"] = elems[2]
+
+def _handle_dmg(output, elems):
+    if len(elems) >= 2:
+        output["eligibility"]["subscriber_dob"] = elems[1]
+
+def _handle_grp(output, elems):
+    if elems:
+        output["eligibility"]["group_no"] = elems[0]
+
+def _handle_pb(output, elems):
+    if len(elems) >= 2:
+        output["policy_benefits"]["PolicyName"] = elems[0]
+        output["policy_benefits"]["Coverage"] = elems[1]
+
+def _handle_ben(output, elems):
+    if len(elems) >= 2:
+        benefit = {"type": elems[0], "description": elems[1]}
+        output["policy_benefits"]["details"].append(benefit)
+
+def _handle_pa(output, elems):
+    if len(elems) >= 4:
+        output["basic_auth"]["auth_status"] = elems[0]
+        output["basic_auth"]["auth_number"] = elems[1]
+        output["basic_auth"]["auth_date"] = elems[2]
+        output["basic_auth"]["auth_expiry_date"] = elems[3]
+
+def _handle_icd(output, elems):
+    if elems:
+        output["icd_codes"].append(elems[0])
+
+def _handle_cpt(output, elems):
+    if elems:
+        output["cpt_codes"].append(elems[0])
+
+SEGMENT_HANDLERS = {
+    "GS": _handle_gs,
+    "NM1": _handle_nm1,
+    "DOB": _handle_dob,
+    "N3": _handle_n3,
+    "PRV": _handle_prv,
+    "EB": _handle_eb,
+    "DMG": _handle_dmg,
+    "GRP": _handle_grp,
+    "PB": _handle_pb,
+    "BEN": _handle_ben,
+    "PA": _handle_pa,
+    "ICD": _handle_icd,
+    "CPT": _handle_cpt,
+}
 
 def extract_edi_fields(parsed_segments):
     output = {
@@ -234,78 +307,13 @@ def extract_edi_fields(parsed_segments):
     }
     
     for seg in parsed_segments:
-        tag = seg.get("tag")
-        elems = seg.get("elements", [])
-        
-        if tag == "GS":
-            # GS: [HI, Submitter Sanders, Receiver Roberts, Payer Paddington, ...]
-            if len(elems) >= 4:
-                output["submitter"] = elems[1]
-                output["receiver"] = elems[2]
-                output["payer"] = elems[3]
-        elif tag == "NM1":
-            # Provider NM1: first element "82"
-            if elems and elems[0] == "82":
-                for element in elems:
-                    if not output["provider"].get("name") and is_name(element):
-                        output["provider"]["name"] = element
-                    if not output["provider"].get("npi") and is_npi(element):
-                        output["provider"]["npi"] = element
-            # Member NM1: first element "IL"
-            elif elems and elems[0] == "IL":
-                if len(elems) >= 5:
-                    # For member, we assume first name is at index 2 and last name is at index 1.
-                    first_name = elems[2]
-                    last_name = elems[1]
-                    output["member"]["name"] = f"{first_name} {last_name}"
-                    output["member"]["member_id"] = elems[4]
-        elif tag == "DOB":
-            if elems:
-                output["member"]["dob"] = elems[0]
-        elif tag == "N3":
-            # If provider already has a name and no address, assign provider address.
-            if "name" in output["provider"] and "address" not in output["provider"]:
-                output["provider"]["address"] = elems[0]
-            elif "name" in output["member"] and "address" not in output["member"]:
-                output["member"]["address"] = elems[0]
-        elif tag == "PRV":
-            for element in elems:
-                if not output["provider"].get("taxonomy") and is_taxonomy(element):
-                    output["provider"]["taxonomy"] = element
-        elif tag == "EB":
-            if len(elems) >= 3:
-                output["eligibility"]["is_eligible"] = elems[0]
-                output["eligibility"]["start_date"] = elems[1]
-                output["eligibility"]["end_date"] = elems[2]
-        elif tag == "DMG":
-            if len(elems) >= 2:
-                output["eligibility"]["subscriber_dob"] = elems[1]
-        elif tag == "GRP":
-            if elems:
-                output["eligibility"]["group_no"] = elems[0]
-        elif tag == "PB":
-            if len(elems) >= 2:
-                output["policy_benefits"]["PolicyName"] = elems[0]
-                output["policy_benefits"]["Coverage"] = elems[1]
-        elif tag == "BEN":
-            if len(elems) >= 2:
-                benefit = {"type": elems[0], "description": elems[1]}
-                output["policy_benefits"]["details"].append(benefit)
-        elif tag == "PA":
-            if len(elems) >= 4:
-                output["basic_auth"]["auth_status"] = elems[0]
-                output["basic_auth"]["auth_number"] = elems[1]
-                output["basic_auth"]["auth_date"] = elems[2]
-                output["basic_auth"]["auth_expiry_date"] = elems[3]
-        elif tag == "ICD":
-            if elems:
-                output["icd_codes"].append(elems[0])
-        elif tag == "CPT":
-            if elems:
-                output["cpt_codes"].append(elems[0])  
+        handler = SEGMENT_HANDLERS.get(seg.tag)
+        if handler is not None:
+            handler(output, seg.elements)
     return output
 
-def extract_provider_details(extracted_json):
+def provider_llm_request(extracted_json):
+    # Returns (messages, cache_key) for the provider extraction prompt.
     system_message = "You are a helpful assistant that extract healthcare provider related features from a Healthcare Claim inputted as JSON"
     provider_details = extracted_json.get("provider", [])
     prompt = f"""You are given provider details extracted from an EDI file as a list:
@@ -323,16 +331,22 @@ def extract_provider_details(extracted_json):
     ),
     ("human", prompt),
     ]
-    ai_msg = llm.invoke(messages)
-    response = ai_msg.content
-    print("Response 1 = ", response, " ", type(response))
-    response = response.replace('json','').replace("```","")
-    res = (m := re.search(r'({.*})', response, re.DOTALL)) and m.group(1)
-    print("Response 2 = ", res)
-    provider_features = json.loads(res)
+    return messages, make_key(provider_details, prompt, LLM_MODEL_VERSION)
+
+def extract_provider_details(extracted_json):
+    messages, cache_key = provider_llm_request(extracted_json)
+    provider_features = llm_cache.get(cache_key)
+    if provider_features is not None:
+        return provider_features
+    with stage_timer("llm_provider"):
+        ai_msg = get_llm().invoke(messages)
+    log_payload(log, "LLM provider response", ai_msg.content)
+    provider_features = parse_llm_json(ai_msg.content)
+    llm_cache.set(cache_key, provider_features)
     return provider_features
-    
-def extract_member_details(extracted_json):
+
+def member_llm_request(extracted_json):
+    # Returns (messages, cache_key) for the member extraction prompt.
     system_message = "You are a helpful assistant that extract healthcare member related features from a Healthcare Claim inputted as JSON"
     member_details = extracted_json.get("member", [])
     prompt = f"""You are given member details extracted from an EDI file as a list:
@@ -351,44 +365,96 @@ def extract_member_details(extracted_json):
     ),
     ("human", prompt),
     ]
-    ai_msg = llm.invoke(messages)
-    response = ai_msg.content
-    response = response.replace('json','').replace("```","")
-    res = (m := re.search(r'({.*})', response, re.DOTALL)) and m.group(1)
-    a = json.loads(res)
+    return messages, make_key(member_details, prompt, LLM_MODEL_VERSION)
+
+def extract_member_details(extracted_json):
+    messages, cache_key = member_llm_request(extracted_json)
+    a = llm_cache.get(cache_key)
+    if a is None:
+        with stage_timer("llm_member"):
+            ai_msg = get_llm().invoke(messages)
+        log_payload(log, "LLM member response", ai_msg.content)
+        a = parse_llm_json(ai_msg.content)
+        llm_cache.set(cache_key, a)
     #print(a)
     b = json.dumps(a, indent=2)
     return b
 
-def fetch_provider_score(provider_features, providers_db):
-    retries = 3
-    delay = 2
-    for attempt in range(retries):
+def get_provider_features(extracted_json, llm_fallback=True):
+    # Rules first; the LLM only runs when a field can't be resolved locally.
+    provider_features, missing = normalize_provider(extracted_json.get("provider", {}))
+    if missing and llm_fallback:
+        log.info("Provider fields not resolved by rules, falling back to LLM", extra={"fields": {"missing": missing}})
+        return extract_provider_details(extracted_json), "llm"
+    return provider_features, "rules"
+
+def get_member_features(extracted_json, llm_fallback=True):
+    member_features, missing = normalize_member(extracted_json.get("member", {}))
+    if missing and llm_fallback:
+        log.info("Member fields not resolved by rules, falling back to LLM", extra={"fields": {"missing": missing}})
+        return extract_member_details(extracted_json), "llm"
+    return json.dumps(member_features, indent=2), "rules"
+
+TRANSIENT_STATUS = [500, 502, 503, 504]
+
+def post_score_request(url, payload):
+    # Retries transient 5xx, connection errors and timeouts with jittered
+    # exponential backoff under an overall deadline that also caps each
+    # attempt's timeout. Raises CircuitOpenError instead of calling a tripped
+    # endpoint and ServiceUnavailableError when no answer came back, so an
+    # outage is never reported as "not present".
+    import requests  # deferred with the rest of the HTTP stack, see http_pool
+    breaker = get_breaker(url)
+    headers = {"Accept": "application/json", "Content-Type": "application/json",}
+    error = None
+    for attempt, remaining in scoring_retry.attempts():
+        if not breaker.allow_request():
+            raise CircuitOpenError(url)
+        try:
+            response = http_pool.post(url, json=payload, headers=headers, timeout=http_pool.attempt_timeout(remaining))
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as req_err:
+            breaker.record_failure()
+            log.warning("Scoring request failed", extra={"fields": {"url": url, "attempt": attempt, "error": str(req_err)}})
+            error = str(req_err)
+            continue
+        except requests.exceptions.RequestException as req_err:
+            breaker.record_failure()
+            log.warning("Scoring request failed", extra={"fields": {"url": url, "error": str(req_err)}})
+            raise ServiceUnavailableError(url, str(req_err)) from req_err
+        if response.status_code in TRANSIENT_STATUS:
+            breaker.record_failure()
+            log_payload(log, "Scoring error response", response.text)
+            error = f"HTTP {response.status_code}"
+            continue
+        breaker.record_success()
         try:
-            #payload = {"Npi": str(provider_npi)}
-            payload = provider_features
-            headers = {"Accept": "application/json", "Content-Type": "application/json",}
-            response = requests.post(providers_db, json=payload, headers=headers)
-            if response.status_code in [500, 502, 503, 504]:
-                #print(f"Transient error (HTTP {response.status_code}). Retrying {attempt + 1}/{retries}...")
-                time.sleep(delay)
-                continue
             response.raise_for_status()
-            return response.json()
         except requests.exceptions.HTTPError as http_err:
-            if response.status_code in [500, 502, 503, 504] and attempt < retries - 1:
-                #print(f"HTTP error occurred: {http_err}. Retrying {attempt + 1}/{retries}...")
-                time.sleep(delay)
-            else:
-                print(f"HTTP error occurred: {http_err}")
-                print(f"Response content: {response.text}")
-                return None
-        except requests.exceptions.RequestException as req_err:
-            print(f"Request exception occurred: {req_err}")
+            log.warning("Scoring HTTP error", extra={"fields": {"url": url, "status_code": response.status_code}})
+            log_payload(log, "Scoring error response", response.text)
             return None
+        return response.json()
+    log.warning("Scoring service unavailable after retries", extra={"fields": {"url": url, "error": error}})
+    raise ServiceUnavailableError(url, f"Scoring service unavailable after retries: {error}")
+
+def fetch_provider_score(provider_features, providers_db):
+    #payload = {"Npi": str(provider_npi)}
+    payload = provider_features
+    return score_cache.get_or_fetch(
+        providers_db, payload, lambda: score_batcher.fetch(providers_db, payload, post_score_request))
 
-def validate_provider_api(provider_features, providers_db):
-    result = fetch_provider_score(provider_features, providers_db)
+def rejected_npi(npi):
+    # An NPI that fails the check digit can't match; answer without calling the service.
+    if not npi or is_npi(npi):
+        return None
+    log.info("Provider NPI failed check digit validation", extra={"fields": {"npi": npi}})
+    response = {
+        "message": "Provider Not Validated because NPI is invalid",
+        "data": {"Npi": npi}
+    }
+    return (response, False)
+
+def provider_validation(result):
     text = "Provider Validation Result"
     if result and result[0]['SCORE']:
         score = ((result[0])['SCORE']['Final_Score'])
@@ -404,42 +470,24 @@ def validate_provider_api(provider_features, providers_db):
             text = "Provider Not Validated due to Less Score"
             return (response, False)
     else:
-        print("Invalid provider ID because Provider Not Present")
+        log.info("Invalid provider ID because Provider Not Present")
         text = "Provider Not Validated because Provider Not Present"
+        response = {
+            "message": text,
+            "data": {}
+        }
         return (response, False)
 
 def fetch_member_score(member_features, members_db):
-    retries = 3
-    delay = 2
-    for attempt in range(retries):
-        try:
-            payload = json.loads(member_features)
-            headers = {"Accept": "application/json", "Content-Type": "application/json",}
-            response = requests.post(members_db, json=payload, headers=headers)
-            if response.status_code in [500, 502, 503, 504]:
-                #print(f"Transient error (HTTP {response.status_code}). Retrying {attempt + 1}/{retries}...")
-                time.sleep(delay)
-                continue
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.HTTPError as http_err:
-            if response.status_code in [500, 502, 503, 504] and attempt < retries - 1:
-                #print(f"HTTP error occurred: {http_err}. Retrying {attempt + 1}/{retries}...")
-                time.sleep(delay)
-            else:
-                print(f"HTTP error occurred: {http_err}")
-                print(f"Response content: {response.text}")
-                return None
-        except requests.exceptions.RequestException as req_err:
-            print(f"Request exception occurred: {req_err}")
-            return None
+    payload = json.loads(member_features)
+    return score_cache.get_or_fetch(
+        members_db, payload, lambda: score_batcher.fetch(members_db, payload, post_score_request))
 
-def validate_member_api(member_features, members_db):
-    result = fetch_member_score(member_features, members_db) 
+def member_validation(result):
     text = "Member Validation Result"
     if result and result[0]['SCORE']:
         score = ((result[0])['SCORE']['Final_Score'])
-        print("Score obtained = ", score)
+        log.debug("Member score obtained", extra={"fields": {"score": score}})
         score1 = str(result[0]['SCORE'])    
         response = {
             "message": text,
@@ -452,226 +500,415 @@ def validate_member_api(member_features, members_db):
             text = "Member Not Validated due to Less Score"
             return (response, False)
     else:
-        print("Invalid Member ID because Member Not Present")
+        log.info("Invalid Member ID because Member Not Present")
         text = "Member Not Validated because Member Not Present"
+        response = {
+            "message": text,
+            "data": {}
+        }
         return (response, False)
 
+ELIGIBLE_FLAGS = ("yes", "true", "valid")
+AUTH_APPROVED_FLAGS = ("approved", "true", "valid")
+
+def eligibility_window_failure(eligibility_features, now):
+    # None when the member is eligible on now, otherwise the reason it isn't.
+    return check_window(eligibility_features.get("is_eligible"), ELIGIBLE_FLAGS,
+                        eligibility_features.get("start_date"), eligibility_features.get("end_date"), now)
+
+def auth_window_failure(auth_basics, now):
+    return check_window(auth_basics.get("auth_status"), AUTH_APPROVED_FLAGS,
+                        auth_basics.get("auth_date"), auth_basics.get("auth_expiry_date"), now)
+
 def validate_eligibility(eligibility_features):
-    valid = False
-    elig = eligibility_features["is_eligible"].lower()
-    #print("eligibility = ",elig, type(elig))
-    if elig in ["yes", "true", "valid"]:
-        today = datetime.datetime.today()
-        print("Today's Date = ", today)
-        start = datetime.datetime.strptime(eligibility_features["start_date"], "%m-%d-%Y")
-        end = datetime.datetime.strptime(eligibility_features["end_date"], "%m-%d-%Y")
-        if start <= today <= end:
-            valid = True
-        else:
-            valid = False
-    return valid
+    return eligibility_window_failure(eligibility_features, request_now()) is None
 
 def validate_auth(auth_basics):
-    valid = False
-    elig = auth_basics["auth_status"].lower()
-    #print("eligibility = ",elig, type(elig))
-    if elig in ["approved", "true", "valid"]:
-        today = datetime.datetime.today()
-        print("Today's Date = ", today)
-        start = datetime.datetime.strptime(auth_basics["auth_date"], "%m-%d-%Y")
-        end = datetime.datetime.strptime(auth_basics["auth_expiry_date"], "%m-%d-%Y")
-        if start <= today <= end:
-            valid = True
-        else:
-            valid = False
-    return valid
+    return auth_window_failure(auth_basics, request_now()) is None
+
+def load_edi_segments(blob_url):
+    # Returns (segments, None) or (None, failure_response).
+    # The blob is streamed in chunks and decoded one segment at a time, so the
+    # raw bytes and a decoded copy of the whole file are never held together.
+    blob_name = os.path.basename(blob_url)
+    with stage_timer("blob_read"):
+        chunks = edi_store.iter_chunks(blob_name)
+        # Tokenize once; validation and parsing both work off the same segments.
+        segments = list(iter_segments_bytes(chunks)) if chunks is not None else None
+    if segments is None:
+        return None, edi_not_found_response(blob_url)
+    return segments, None
+
+def edi_not_found_response(blob_url):
+    count_failure("edi_not_found")
+    log.warning("EDI File Not Found", extra={"fields": {"blob_url": blob_url}})
+    return {
+        "message": "EDI File Not Found",
+        "data": {"error": "File does not exist in blob storage"},
+        "status":"fail"}
+
+def processing_failed_response(err):
+    count_failure("processing_error")
+    return {
+        "message": "Processing Failed",
+        "data": {"error": str(err)},
+        "status":"fail"}
+
+def scoring_unavailable_response(err):
+    count_failure("scoring_unavailable")
+    log.error("Authentication not completed because Scoring Service Unavailable", extra={"fields": {"endpoint": err.endpoint, "error": str(err)}})
+    return {
+        "message": "Scoring Service Unavailable",
+        "data": {"endpoint": err.endpoint, "error": str(err)},
+        "status":"unavailable"}
+
+def identity_key(details):
+    return json.dumps(details, sort_keys=True, default=str)
+
+def extraction_path(ctx):
+    return {"provider": ctx.get("provider_path"), "member": ctx.get("member_path")}
+
+# Pipeline stages. Each takes the claim context and returns None to pass or
+# the failure response. Provider and member features and scores go through
+# ctx["shared"], so the claims of one request or batch look up each distinct
+# provider and member once.
+
+def envelope_stage(ctx):
+    if ctx["envelope_errors"]:
+        count_failure("edi_envelope_validation")
+        log.warning("EDI Validation Failed for transaction", extra={"fields": {"errors": ctx["envelope_errors"]}})
+        return {
+            "message": "EDI Validation Failure",
+            "data": {"errors": ctx["envelope_errors"]},
+            "status":"fail"}
+
+def edi_validation_stage(ctx):
+    edi_validity = validate_edi_278(ctx["segments"])
+    if edi_validity == False:
+        count_failure("edi_validation")
+        log.warning("EDI Validation Failed")
+        return {
+            "message": "EDI Validation Failure",
+            "data": {},
+            "status":"fail"}
+    log.debug("EDI Validity", extra={"fields": {"edi_validity": edi_validity}})
+
+def parse_stage(ctx):
+    ctx["parsed"] = parse_edi_file(ctx["segments"], ctx["claim_values"]["output_extracted_json"])
+
+def field_extraction_stage(ctx):
+    extracted_json = ctx["extracted_json"] = extract_edi_fields(ctx["parsed"])
+    if not list(extracted_json.keys()):
+        count_failure("no_extraction")
+        return {
+            "message": "Fail due to No Extraction",
+            "data": {},
+            "status":"fail"}
+
+def required_fields_stage(ctx):
+    list_fields_1 = ctx["claim_values"]["fields_need_to_check"]
+    list_fields_2 = list(ctx["extracted_json"].keys())
+    valid_extraction = (all(x in list_fields_2 for x in list_fields_1))
+    log.debug("All Fields Extraction Validation", extra={"fields": {
+        "required": list_fields_1, "extracted": list_fields_2, "valid_extraction": valid_extraction}})
+    if valid_extraction==False:
+        count_failure("incomplete_extraction")
+        log.warning("Extraction Validation Failed")
+        return {
+            "message": "Fail due to Invalid or Incomplete Extraction",
+            "data": {"member":{}, "provider":{}},
+            "status":"fail"}
+
+def parties_present_stage(ctx):
+    extracted_json = ctx["extracted_json"]
+    if not extracted_json["provider"] or not extracted_json["member"]:
+        count_failure("member_or_provider_not_extracted")
+        log.warning("Provider or Member are not Extracted")
+        return {
+            "message": "Fail due to Member or Provider details not extracted",
+            "data": {"member":extracted_json["member"], "provider":extracted_json["provider"]},
+            "status":"fail"}
+
+def npi_check_stage(ctx):
+    # Runs on the extracted NPI, before the provider features (and any LLM
+    # fallback) are built. A provider with no NPI-shaped element passes and
+    # is left to the features and the scoring service.
+    rejected = rejected_npi(ctx["extracted_json"]["provider"].get("npi"))
+    if rejected is not None:
+        return provider_failure_response(ctx, rejected, "invalid_npi")
+
+def eligibility_stage(ctx):
+    eligibility_features = ctx["extracted_json"].get("eligibility") or {}
+    reason = eligibility_window_failure(eligibility_features, request_now())
+    if reason is not None:
+        count_failure("eligibility")
+        log.info("Authentication not approved because of Eligibility Validation Fail", extra={"fields": {"reason": reason}})
+        return {
+            "message": "Eligibity Validation Failed",
+            "data": {"reason": reason, "eligibility": eligibility_features},
+            "status":"fail"}
+
+def auth_stage(ctx):
+    auth_basics = ctx["extracted_json"].get("basic_auth") or {}
+    reason = auth_window_failure(auth_basics, request_now())
+    if reason is not None:
+        count_failure("basic_auth")
+        log.info("Authentication not approved because of Basic Auth Validation Fail", extra={"fields": {"reason": reason}})
+        return {
+            "message": "Basic Auth Validation Failed",
+            "data": {"reason": reason, "basic_auth": auth_basics},
+            "status":"fail"}
+
+def provider_features_stage(ctx):
+    provider = ctx["extracted_json"]["provider"]
+    llm_fallback = ctx["claim_values"].get("llm_fallback", True)
+    ctx["provider_features"], ctx["provider_path"] = ctx["shared"].get(
+        ("provider_features", identity_key(provider)), lambda: get_provider_features({"provider": provider}, llm_fallback))
+    log_payload(log, "Provider features", ctx["provider_features"])
+
+def provider_scoring_stage(ctx):
+    provider_features = ctx["provider_features"]
+    providers_db = ctx["claim_values"]["providers_db"]
+    try:
+        ctx["provider_result"] = ctx["shared"].get(
+            ("provider_scoring", identity_key(provider_features)), lambda: fetch_provider_score(provider_features, providers_db))
+    except ServiceUnavailableError as err:
+        return scoring_unavailable_response(err)
+
+def provider_decision_stage(ctx):
+    valid_provider = ctx["valid_provider"] = provider_validation(ctx["provider_result"])
+    log_payload(log, "Provider validation", valid_provider)
+    if not valid_provider[1]:
+        return provider_failure_response(ctx, valid_provider)
+
+def provider_failure_response(ctx, valid_provider, reason="provider_validation"):
+    # provider_decision waits for member_features, so a scored provider that
+    # fails always carries the member features. npi_check fails before any
+    # expensive stage starts, so an NPI rejection always carries None.
+    count_failure(reason)
+    log.info("Authentication not approved because of Provider Validation Fail")
+    return {
+        "message": "Provider Validation Failed",
+        "data": {"member":ctx.get("member_features"), "provider":valid_provider[0]},
+        "status":"fail",
+        "extraction_path": extraction_path(ctx)}
+
+def member_features_stage(ctx):
+    member = ctx["extracted_json"]["member"]
+    llm_fallback = ctx["claim_values"].get("llm_fallback", True)
+    ctx["member_features"], ctx["member_path"] = ctx["shared"].get(
+        ("member_features", identity_key(member)), lambda: get_member_features({"member": member}, llm_fallback))
+    log_payload(log, "Member features", ctx["member_features"])
+
+def member_scoring_stage(ctx):
+    member_features = ctx["member_features"]
+    members_db = ctx["claim_values"]["members_db"]
+    try:
+        ctx["member_result"] = ctx["shared"].get(
+            ("member_scoring", member_features), lambda: fetch_member_score(member_features, members_db))
+    except ServiceUnavailableError as err:
+        return scoring_unavailable_response(err)
+
+def member_decision_stage(ctx):
+    valid_member = ctx["valid_member"] = member_validation(ctx["member_result"])
+    log_payload(log, "Member validation", valid_member)
+    if not valid_member[1]:
+        count_failure("member_validation")
+        log.info("Authentication not approved because of Member Validation Fail")
+        return {
+            "message": "Member Validation Failed",
+            "data": {"member":valid_member[0], "provider":ctx.get("provider_features")},
+            "status":"fail",
+            "extraction_path": extraction_path(ctx)}
+
+# The free local checks (envelope, EDI validation, required fields, parties,
+# eligibility and auth windows) always run before the LLM and scoring
+# stages; the provider and member chains run side by side on
+# branch_executor ("execution_mode": "serial" runs them in the caller).
+CLAIM_STAGES = StageGraph([
+    Stage("envelope", CHEAP, envelope_stage),
+    Stage("edi_validation", LOCAL, edi_validation_stage, ["envelope"]),
+    Stage("parse", LOCAL, parse_stage, ["edi_validation"]),
+    Stage("field_extraction", LOCAL, field_extraction_stage, ["parse"]),
+    Stage("required_fields", CHEAP, required_fields_stage, ["field_extraction"]),
+    Stage("parties_present", CHEAP, parties_present_stage, ["required_fields"]),
+    Stage("eligibility", CHEAP, eligibility_stage, ["field_extraction"]),
+    Stage("auth", CHEAP, auth_stage, ["field_extraction"]),
+    Stage("npi_check", CHEAP, npi_check_stage, ["parties_present"]),
+    Stage("provider_features", EXPENSIVE, provider_features_stage, ["npi_check", "eligibility", "auth"]),
+    Stage("provider_scoring", EXPENSIVE, provider_scoring_stage, ["provider_features"]),
+    Stage("member_features", EXPENSIVE, member_features_stage, ["parties_present", "eligibility", "auth"]),
+    Stage("provider_decision", CHEAP, provider_decision_stage, ["provider_scoring", "member_features"]),
+    Stage("member_scoring", EXPENSIVE, member_scoring_stage, ["member_features"]),
+    Stage("member_decision", CHEAP, member_decision_stage, ["member_scoring"]),
+])
+
+def claim_context(segments, claim_values, shared, envelope_errors=()):
+    return {"segments": segments, "claim_values": claim_values, "shared": shared, "envelope_errors": envelope_errors}
+
+def claim_response(ctx, failure, stages):
+    # Every response carries the per-stage report: status, cost class and
+    # seconds for each stage that ran, skip_reason for each that didn't.
+    if failure is None:
+        failure = {
+            "message": "All Validation Passed",
+            "data": {"member":ctx["valid_member"][0], "provider":ctx["valid_provider"][0]},
+            "status":"pass",
+            "extraction_path": extraction_path(ctx)}
+    return dict(failure, stages=stages)
+
+def run_claim(ctx):
+    executor = branch_executor if ctx["claim_values"].get("execution_mode", "parallel") == "parallel" else None
+    failure, stages = CLAIM_STAGES.run(ctx, executor)
+    return claim_response(ctx, failure, stages)
+
+def transaction_info(transaction):
+    return {"group_control": transaction["group_control"], "transaction_control": transaction["transaction_control"]}
+
+def authenticate_segments(segments, blob_url, claim_values, shared):
+    # Returns one (transaction_info, response) entry per transaction set. A
+    # plain single-transaction file yields a single entry with
+    # transaction_info None; multi-transaction interchanges are split and
+    # their transactions authenticated concurrently.
+    transactions = split_transactions(segments)
+    if len(transactions) <= 1:
+        return [(None, run_claim(claim_context(segments, claim_values, shared)))]
+    log.info("Interchange split into transactions", extra={"fields": {"blob_url": blob_url, "transactions": len(transactions)}})
+    # The provider elements of all transactions are classified once, as a column.
+    with classified_column(classifier_column(segments)):
+        return list(transaction_executor.map(
+            lambda transaction: (transaction_info(transaction), run_transaction(transaction, claim_values, shared)), transactions))
+
+def classifier_column(segments):
+    # The NM1*82 and PRV elements: the only ones extract_edi_fields runs the field classifiers on.
+    return [element for seg in segments if seg[0] == "PRV" or (seg[0] == "NM1" and len(seg) > 1 and seg[1] == "82")
+            for element in seg[1:]]
+
+def run_transaction(transaction, claim_values, shared):
+    # A transaction that raises fails on its own; the other transactions of
+    # the interchange still get their results.
+    try:
+        return run_claim(claim_context(transaction["segments"], claim_values, shared, transaction["errors"]))
+    except Exception as err:
+        log.exception("Transaction processing failed", extra={"fields": transaction_info(transaction)})
+        return processing_failed_response(err)
+
+def authenticate_file(blob_url, claim_values, shared):
+    segments, failure = load_edi_segments(blob_url)
+    if failure is not None:
+        return [(None, failure)]
+    return authenticate_segments(segments, blob_url, claim_values, shared)
+
+def combine_transactions(entries):
+    # Single-transaction files keep the original response; interchanges return
+    # a list of per-transaction results.
+    if len(entries) == 1 and entries[0][0] is None:
+        return entries[0][1]
+    results = [dict(info, result=response) for info, response in entries]
+    status = "pass" if all(r["result"]["status"] == "pass" for r in results) else "fail"
+    return {
+        "message": f"Interchange Processed with {len(results)} transactions",
+        "data": {"transactions": results},
+        "status": status}
 
-def read_edi_from_blob(blob_url):
-    """Read EDI content from the given blob URL"""
-    config_for_edi = load_config("custom_edi.config")
-    
-    # Create a BlobServiceClient using the connection string
-    CONNECTION_STRING = "".join(config_for_edi["blob_credentials"]["CONNECTION_STRING"])
-    
-    blob_service_client = BlobServiceClient.from_connection_string(CONNECTION_STRING)
-    container_name = config_for_edi["blob_credentials"]["CONTAINER_NAME"]
-    blob_name = os.path.basename(blob_url)  # Extract filename from URL
-    
-    blob_client = blob_service_client.get_blob_client(container=container_name, blob=blob_name)
-    
-    if not blob_client.exists():
-        return {"error": "File does not exist in blob storage"}
-    
-    blob_data = blob_client.download_blob().readall()
-    return blob_data.decode('utf-8')
-    
 @app.route('/authentication_flow', methods=['GET', 'POST'])
+@metrics.observe_request("authentication_flow")
 def authentication_flow():
-    claim_values = load_config("custom_edi.config")
+    claim_values = config.snapshot()
+    # ?score_cache=bypass forces fresh provider/member scores for this request.
+    score_cache_bypass.set(request.args.get("score_cache") == "bypass")
+    bind_request_clock()
     blob_url = request.args.get("blob_url")
     #print("Request = ", blob_url)
     if not blob_url:
         return jsonify({"error": "blob_url is required"}), 400
 
-    print(f"Processing EDI from Blob URL: {blob_url}")
-    
-    list_fields_1 = (claim_values["fields_need_to_check"])
-    """
-    if len(sys.argv) < 2:
-        print(json.dumps({"error": "Blob URL required"}))
-        sys.exit(1)
-    blob_url = sys.argv[1]
-    
-    sample_input = claim_values["edi_features"]
-    list_text = list()
-    list_message = list()
-    print("Features Present in the Input EDI ....... ")
-    print(list(sample_input.keys()))
-    output_file = claim_values["output_edi"]
-    """
-    
-    list_text = list()
-    list_message = list()
+    log.info("Processing EDI from Blob URL", extra={"fields": {"blob_url": blob_url}})
     start_time = time.time()
-    edi_content = read_edi_from_blob(blob_url)
-    #print(edi_content)
-    flag = False
-    edi_validity = validate_edi_278(edi_content)
-    if edi_validity == False:
-        print("EDI Validation Failed .......... ")
-        list_text.append("EDI Validation Failed ..........")
-        list_message.append("No Further Prior Authorization ......")
-        flag = True
-        response = {
-        "message": "EDI Validation Failure",
-        "data": {},
-        "status":"fail"}
-        return jsonify(response)
-    else:
-        print("EDI Validity = ", edi_validity)
-        list_text.append("EDI Validation Done")
-        list_message.append("Proceeding after EDI Validation .....")
-    #json_segments = edi_to_json(edi_content)
-    if flag == False:
-        #edi_file_path = claim_values["output_edi"]
-        json_output_path = claim_values["output_extracted_json"]
-        #parsed = parse_edi_file(edi_file_path, json_output_path) 
-        parsed = parse_edi_file(edi_content, json_output_path)
-        extracted_json = extract_edi_fields(parsed)
-        if not list(extracted_json.keys()):
-            response = {
-                    "message": "Fail due to No Extraction",
-                    "data": {},
-                    "status":"fail"}
-            return jsonify(response)
-        list_fields_2 = list(extracted_json.keys())
-        print("List Match are ",list_fields_1)
-        print("List Match are ",list_fields_2)
-        valid_extraction = (all(x in list_fields_2 for x in list_fields_1))
-        print("All Fields Extraction Validation = ",valid_extraction)
-        if valid_extraction==False:
-            print("Extraction Validation Failed .......... ")
-            list_text.append("Extraction Validation Failed ..........")
-            list_message.append("No Further Prior Authorization ......")
-            flag = True
-            response = {
-                    "message": "Fail due to Invalid or Incomplete Extraction",
-                    "data": {"member":{}, "provider":{}},
-                    "status":"fail"}
-            return jsonify(response)
-        else:
-            print("Extraction Validity = ", valid_extraction)
-            list_text.append("Extraction Validation Done")
-            list_message.append("Proceeding after Extraction Validation .....")
-        if flag == False:
-            x1 = (bool(extracted_json["provider"]))
-            x2 = (bool(extracted_json["member"]))
-            print("Keys in extracted_json = ", (list(extracted_json.keys())))
-            if x1 == False or x2 == False:
-                print("Provider or Member are not Extracted")
-                flag = True
-                response = {
-                    "message": "Fail due to Member or Provider details not extracted",
-                    "data": {"member":extracted_json["member"], "provider":extracted_json["provider"]},
-                    "status":"fail"}
-                return jsonify(response)
-            else:
-                provider_features = extract_provider_details(extracted_json)
-                member_features = extract_member_details(extracted_json)
-                print(provider_features)
-                print(member_features)
-                providers_db = claim_values["providers_db"]
-                members_db = claim_values["members_db"]
-                valid_provider = validate_provider_api(provider_features, providers_db)
-                print(valid_provider)
-                if(valid_provider[1] == "False"):
-                    print("Authentication not approved because of Provider Validation Fail")
-                    list_text.append("Authentication not approved because of Provider Validation Fail")
-                    list_message.append("No Further Prior Authorization ......")
-                    flag = True
-                    response = {
-                        "message": "Provider Validation Failed",
-                        "data": {"member":member_features, "provider":valid_provider[0]},
-                        "status":"fail"}
-                    return jsonify(response)
-                else:
-                    list_text.append(str(provider_features))
-                    list_message.append("Proceeding after Provider Validation .....")
-                valid_member = validate_member_api(member_features, members_db)
-                print(valid_member)
-                if(valid_member[1] == "False"):
-                    print("Authentication not approved because of Member Validation Fail")
-                    list_text.append("Authentication not approved because of Member Validation Fail")
-                    list_message.append("No Further Prior Authorization ......")
-                    flag = True
-                    response = {
-                        "message": "Member Validation Failed",
-                        "data": {"member":valid_member[0], "provider":provider_features},
-                        "status":"fail"}
-                    return jsonify(response)
-                else:
-                    s = str(member_features)
-                    s = s.replace("\\","")
-                    list_text.append(s)
-                    list_message.append("Proceeding after Member Validation .....")
-                if flag == False:
-                    eligibility_features = extracted_json["eligibility"]
-                    valid = validate_eligibility(eligibility_features)
-                    print("Validation for Eligibility = ",valid)
-                    if valid=="False":
-                        list_text.append("Authentication not approved because of Eligibility Fail")
-                        list_message.append("No Further Prior Authorization ......")
-                        response = {
-                            "message": "Eligibity Validation Failed",
-                            "data": {"member":valid_member[0], "provider":valid_provider[0]},
-                            "status":"fail"}
-                        return jsonify(response)
-                    else:
-                        list_text.append("Eligibility Validation Done")
-                        list_message.append("Proceeding After Eligibility Validation .....")
-                    auth_basics = extracted_json["basic_auth"]
-                    valid = validate_auth(auth_basics)
-                    if valid=="False":
-                        list_text.append("Authentication not approved because of Basic Prior Auth doesn't match")
-                        list_message.append("No Further Prior Authorization ......")
-                        response = {
-                            "message": "Basic Auth Validation Failed",
-                            "data": {"member":valid_member[0], "provider":valid_provider[0]},
-                            "status":"fail"}
-                        return jsonify(response)
-                    else:
-                        list_text.append("Basic Prior Auth Match Done")
-                        list_message.append("Closing the Loop post Basic Prior Auth Validation .....")
-                    print("Validation for Authentication Basics = ",valid)
-        
-    response = {
-            "message": "All Validation Passed",
-            "data": {"member":valid_member[0], "provider":valid_provider[0]},
-            "status":"pass"}
+    entries = authenticate_file(blob_url, claim_values, SharedResults())
+    response = combine_transactions(entries)
     end_time = time.time()
-    print(f"Execution Time: {end_time - start_time:.2f} seconds for Complete Workflow Processing ")
+    log.info("Complete Workflow Processing finished", extra={"fields": {
+        "seconds": round(end_time - start_time, 4), "transactions": len(entries), "status": response["status"]}})
+    if response["status"] == "unavailable":
+        return jsonify(response), 503
     return jsonify(response)
-    
+
+def authenticate_batch_file(blob_url, claim_values, shared):
+    # One unreadable or malformed file fails on its own instead of aborting
+    # the rest of the batch.
+    try:
+        return authenticate_file(blob_url, claim_values, shared)
+    except Exception as err:
+        log.exception("Batch file processing failed", extra={"fields": {"blob_url": blob_url}})
+        return [(None, processing_failed_response(err))]
+
+def authenticate_batch(blob_urls, claim_values):
+    # Files are authenticated side by side on batch_executor; the shared
+    # results mean each distinct provider and member is scored once no
+    # matter how many files in the batch carry it.
+    start_time = time.time()
+    shared = SharedResults()
+    file_entries = list(batch_executor.map(lambda blob_url: authenticate_batch_file(blob_url, claim_values, shared), blob_urls))
+    results = [{"blob_url": blob_url, "result": combine_transactions(entries)} for blob_url, entries in zip(blob_urls, file_entries)]
+    total_time = time.time() - start_time
+    log.info("Batch Workflow Processing finished", extra={"fields": {"seconds": round(total_time, 4), "files": len(blob_urls)}})
+    timing = {
+        "files": len(blob_urls),
+        "transactions": sum(len(entries) for entries in file_entries),
+        "unique_providers": shared.count("provider_features"),
+        "unique_members": shared.count("member_features"),
+        "total_seconds": round(total_time, 4),
+        "passed": sum(1 for r in results if r["result"]["status"] == "pass"),
+    }
+    return results, timing
+
+@app.route('/authentication_flow_batch', methods=['POST'])
+@metrics.observe_request("authentication_flow_batch")
+def authentication_flow_batch():
+    claim_values = config.snapshot()
+    score_cache_bypass.set(request.args.get("score_cache") == "bypass")
+    bind_request_clock()
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({"error": "request body must be a JSON object"}), 400
+    blob_urls = body.get("blob_urls") or request.args.getlist("blob_url")
+    if not isinstance(blob_urls, list) or not all(isinstance(blob_url, str) for blob_url in blob_urls):
+        return jsonify({"error": "blob_urls must be a list of strings"}), 400
+    prefix = body.get("prefix") or request.args.get("prefix")
+    if not blob_urls and prefix:
+        blob_urls = edi_store.list_names(prefix)
+    if not blob_urls:
+        return jsonify({"error": "blob_urls or prefix is required"}), 400
+    max_files = claim_values.get("batch_max_files", 1000)
+    if len(blob_urls) > max_files:
+        return jsonify({"error": f"batch is limited to {max_files} files"}), 400
+    results, timing = authenticate_batch(blob_urls, claim_values)
+    return jsonify({"message": "Batch Processed", "data": results, "timing": timing})
+
+@app.route('/stats', methods=['GET'])
+def stats_api():
+    return jsonify({
+        "llm_cache": llm_cache.stats(),
+        "score_cache": score_cache.stats(),
+        "score_batching": score_batcher.stats(),
+        "http_pool": http_pool.pool_stats(),
+        "circuit_breakers": breaker_stats(),
+        "debug_dumps": debug_dump.stats(),
+        "config": config.stats(),
+        "logging": request_log.stats()})
+
+metrics.register(metrics.Gauge(
+    "prior_auth_circuit_open", "1 when the scoring circuit breaker for an endpoint is open.", ["endpoint"],
+    lambda: {(endpoint,): int(stats["state"] == "open") for endpoint, stats in breaker_stats().items()}))
+metrics.register(metrics.Gauge(
+    "prior_auth_llm_cache_entries", "Entries held by the LLM response cache.", [],
+    lambda: {(): llm_cache.stats().get("size", 0)}))
+
+@app.route('/metrics', methods=['GET'])
+def metrics_api():
+    return metrics.render(), 200, {"Content-Type": metrics.CONTENT_TYPE}
+
 #authentication_flow()
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5007, debug=True)
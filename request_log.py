@@ -0,0 +1,160 @@
+import contextvars
+import datetime
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Structured, non-blocking logging for the apps. Records are emitted as one
+# JSON object per line and carry the current request's correlation id. The
+# request thread only enqueues the record; a QueueListener thread formats
+# and writes it, so a slow stdout never stalls a request. When the queue is
+# full the record is dropped and counted. Payloads (parsed EDI, LLM output,
+# member features) are only attached at DEBUG via log_payload(), so they
+# cost nothing at the default INFO level.
+#
+#   "logging": {"level": "INFO", "queue_size": 10000}
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+_settings = {"level": "INFO", "queue_size": 10000}
+_root = logging.getLogger("priorauth")
+_listener = None
+_handler = None
+_dropped = 0
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", None),
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Runs on the request thread: capture the correlation id and the
+        # traceback text before the record crosses to the listener.
+        record.request_id = request_id_var.get()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        global _dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped += 1
+
+def configure(settings=None, stream=None):
+    global _listener, _handler
+    _settings.update(settings or {})
+    _root.setLevel(str(_settings.get("level", "INFO")).upper())
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+    _handler = _DroppingQueueHandler(queue.Queue(maxsize=_settings.get("queue_size", 10000)))
+    _root.addHandler(_handler)
+    _root.propagate = False
+    _listener = logging.handlers.QueueListener(_handler.queue, output, respect_handler_level=False)
+    _listener.start()
+
+def flush():
+    # Stops the listener after draining the queue; configure() starts a new one.
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        _root.removeHandler(_handler)
+        _listener = None
+        _handler = None
+
+def get_logger(name):
+    return _root.getChild(name)
+
+def log_payload(log, message, payload, **fields):
+    # Payload dumps only at DEBUG; the payload is serialized on the listener thread.
+    if log.isEnabledFor(logging.DEBUG):
+        fields["payload"] = payload
+        log.debug(message, extra={"fields": fields})
+
+def new_request_id():
+    return uuid.uuid4().hex
+
+def bind_request_id(request_id=None):
+    return request_id_var.set(request_id or new_request_id())
+
+def install_flask(app):
+    # Every request gets a correlation id, taken from X-Request-ID when the
+    # caller sends one, and echoed back on the response.
+    from flask import g, request
+
+    @app.before_request
+    def _bind_request_id():
+        g.request_log_token = bind_request_id(request.headers.get(REQUEST_ID_HEADER))
+
+    @app.after_request
+    def _echo_request_id(response):
+        response.headers[REQUEST_ID_HEADER] = request_id_var.get()
+        return response
+
+    @app.teardown_request
+    def _reset_request_id(exc):
+        token = g.pop("request_log_token", None)
+        if token is not None:
+            request_id_var.reset(token)
+
+class RequestIdMiddleware:
+    # ASGI counterpart of install_flask(): binds the correlation id for the
+    # duration of the request and adds it to the response headers.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        sent_id = dict(scope.get("headers") or []).get(REQUEST_ID_HEADER.lower().encode("latin-1"))
+        token = bind_request_id(sent_id.decode("latin-1") if sent_id else None)
+        header = (REQUEST_ID_HEADER.lower().encode("latin-1"), request_id_var.get().encode("latin-1"))
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers") or []) + [header]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    # Runs each task in a copy of the submitter's context so worker threads
+    # log under the request id of the request that queued the work.
+    def submit(self, fn, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+def stats():
+    return {
+        "level": logging.getLevelName(_root.level),
+        "pending": _handler.queue.qsize() if _handler is not None else 0,
+        "dropped": _dropped,
+    }
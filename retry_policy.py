@@ -0,0 +1,152 @@
+import asyncio
+import random
+import threading
+import time
+
+# Retry and circuit-breaker helpers for the scoring services.
+#
+# RetryPolicy.attempts() yields (attempt number, seconds left before the
+# overall deadline or None), sleeping an exponentially growing, fully
+# jittered delay before each retry, and stops once the attempt budget or the
+# deadline is used up; callers cap each attempt's timeout at the seconds
+# left, so the deadline bounds the whole call. CircuitBreaker tracks
+# consecutive failures per endpoint; once open, callers fail fast until the
+# reset timeout lets a single trial request through (half open).
+
+class ServiceUnavailableError(Exception):
+    # The endpoint could not give an answer: retries ran out on transient
+    # errors, or the request failed outright.
+    def __init__(self, endpoint, message=None):
+        super().__init__(message or f"Service unavailable at {endpoint}")
+        self.endpoint = endpoint
+
+class CircuitOpenError(ServiceUnavailableError):
+    def __init__(self, endpoint):
+        super().__init__(endpoint, f"Circuit open for {endpoint}")
+
+class RetryPolicy:
+    def __init__(self, max_attempts=3, base_delay=0.25, max_delay=2.0, multiplier=2.0, deadline=5.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.deadline = deadline
+
+    def backoff(self, attempt):
+        ceiling = min(self.max_delay, self.base_delay * (self.multiplier ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _remaining(self, give_up_at):
+        return give_up_at - time.monotonic() if give_up_at is not None else None
+
+    def attempts(self):
+        give_up_at = time.monotonic() + self.deadline if self.deadline else None
+        for attempt in range(self.max_attempts):
+            if attempt:
+                delay = self.backoff(attempt - 1)
+                if give_up_at is not None and time.monotonic() + delay >= give_up_at:
+                    return
+                time.sleep(delay)
+            yield attempt, self._remaining(give_up_at)
+
+    async def async_attempts(self):
+        # Same schedule as attempts(), but backs off without blocking the event loop.
+        give_up_at = time.monotonic() + self.deadline if self.deadline else None
+        for attempt in range(self.max_attempts):
+            if attempt:
+                delay = self.backoff(attempt - 1)
+                if give_up_at is not None and time.monotonic() + delay >= give_up_at:
+                    return
+                await asyncio.sleep(delay)
+            yield attempt, self._remaining(give_up_at)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    def __init__(self, endpoint, failure_threshold=5, reset_timeout=30.0):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.transitions = {}
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def _move_to(self, state):
+        key = f"{self.state}->{state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        self.state = state
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._move_to(HALF_OPEN)
+                self._trial_in_flight = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+            if self.state != CLOSED:
+                self._move_to(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self._move_to(OPEN)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "rejected": self.rejected,
+                "transitions": dict(self.transitions),
+            }
+
+_breaker_settings = {"failure_threshold": 5, "reset_timeout": 30.0}
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def configure_breakers(settings):
+    with _breakers_lock:
+        merged = dict(_breaker_settings)
+        merged.update(settings or {})
+        if merged == _breaker_settings and _breakers:
+            # Unchanged settings keep the current breaker state.
+            return
+        _breaker_settings.update(merged)
+        _breakers.clear()
+
+def get_breaker(endpoint):
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(endpoint, **_breaker_settings)
+                _breakers[endpoint] = breaker
+    return breaker
+
+def breaker_stats():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.endpoint: breaker.stats() for breaker in breakers}
+
+def build_policy(settings):
+    return RetryPolicy(**(settings or {}))
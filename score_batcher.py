@@ -0,0 +1,284 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from score_cache import make_key
+import request_log
+
+# Micro-batching in front of the provider/member match services. Identical
+# payloads waiting or in flight for one endpoint are coalesced onto one
+# future. With array_requests, lookups that arrive while a batch is in
+# flight are collected until it returns, for at most window_ms (or until
+# max_items are waiting), and sent as a single array request (the
+# downstream accepts a JSON list and answers with one result per item, in
+# order). A lookup for an idle endpoint, and every lookup when the
+# downstream takes one payload per request, is sent at once: there is
+# nothing to merge it with, so it never pays the window. Results
+# are handed back to each waiting caller; an exception from the downstream
+# (e.g. CircuitOpenError) is raised in every caller that was waiting on it.
+#
+#   "score_batching": {"enabled": true, "window_ms": 5, "max_items": 32,
+#                      "array_requests": false, "workers": 16}
+
+log = request_log.get_logger("score_batcher")
+
+_settings = {"enabled": True, "window_ms": 5, "max_items": 32, "array_requests": False, "workers": 16}
+_batchers = {}
+_async_batchers = {}
+_lock = threading.Lock()
+_fanout_executor = None
+
+def configure(settings):
+    # Window, size and array mode apply to open batchers on their next batch.
+    with _lock:
+        _settings.update(settings or {})
+
+def enabled():
+    return bool(_settings.get("enabled"))
+
+def _fanout():
+    global _fanout_executor
+    if _fanout_executor is None:
+        with _lock:
+            if _fanout_executor is None:
+                _fanout_executor = ThreadPoolExecutor(
+                    max_workers=_settings.get("workers", 16), thread_name_prefix="score-fanout")
+    return _fanout_executor
+
+def _new_counters():
+    return {"lookups": 0, "deduped": 0, "batches": 0, "array_requests": 0, "fanout_requests": 0, "largest_batch": 0}
+
+def _record_batch(counters, size):
+    counters["batches"] += 1
+    counters["largest_batch"] = max(counters["largest_batch"], size)
+
+def _send_now(pending, in_flight):
+    # Whether the lookups now pending go out immediately instead of waiting for the window.
+    return (not _settings.get("array_requests") or len(pending) >= _settings["max_items"]
+            or (len(pending) == 1 and not in_flight))
+
+def _array_results(results, size):
+    # An array response is only trusted when it has exactly one entry per item.
+    return isinstance(results, list) and len(results) == size
+
+class ScoreBatcher:
+    def __init__(self, url, send):
+        # send(url, payload) posts one payload, or a list of them in array mode.
+        self.url = url
+        self.send = send
+        self.counters = _new_counters()
+        self._pending = {}
+        self._sending = {}
+        self._timer = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, payload):
+        return self.submit(payload).result()
+
+    def submit(self, payload):
+        key = make_key(self.url, payload)
+        batch = None
+        with self._lock:
+            self.counters["lookups"] += 1
+            entry = self._pending.get(key) or self._sending.get(key)
+            if entry is not None:
+                self.counters["deduped"] += 1
+                return entry[1]
+            future = Future()
+            self._pending[key] = (payload, future)
+            if _send_now(self._pending, self._in_flight):
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(_settings["window_ms"] / 1000.0, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            # A batch that goes out at once is sent by the caller that made
+            # it; it waits on it anyway.
+            self._send(batch)
+        return future
+
+    def _take(self):
+        # Called with the lock held; the batch counts as in flight until _send returns.
+        batch = self._pending
+        self._pending = {}
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if batch:
+            self._in_flight += 1
+            self._sending.update(batch)
+        return batch
+
+    def _flush(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._send(batch)
+
+    def _send(self, batch):
+        try:
+            self._send_batch(list(batch.values()))
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                for key in batch:
+                    self._sending.pop(key, None)
+                # Lookups that queued up behind this batch go now rather than
+                # waiting out the rest of the window.
+                drain = bool(self._pending) and not self._in_flight
+            if drain:
+                _fanout().submit(self._flush)
+
+    def _send_batch(self, batch):
+        with self._lock:
+            _record_batch(self.counters, len(batch))
+        payloads = [payload for payload, _ in batch]
+        if _settings.get("array_requests") and len(batch) > 1:
+            with self._lock:
+                self.counters["array_requests"] += 1
+            try:
+                results = self.send(self.url, payloads)
+            except Exception as err:
+                for _, future in batch:
+                    future.set_exception(err)
+                return
+            if _array_results(results, len(batch)):
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+                return
+            log.warning("Array scoring response did not match the batch, fanning out",
+                        extra={"fields": {"url": self.url, "items": len(batch)}})
+        with self._lock:
+            self.counters["fanout_requests"] += len(batch)
+        if len(batch) == 1:
+            sent = [_call(self.send, self.url, payloads[0])]
+        else:
+            sent = [_fanout().submit(self.send, self.url, payload) for payload in payloads]
+        for (_, future), outcome in zip(batch, sent):
+            try:
+                future.set_result(outcome.result())
+            except Exception as err:
+                future.set_exception(err)
+
+def _call(fn, *args):
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as err:
+        future.set_exception(err)
+    return future
+
+class AsyncScoreBatcher:
+    # Event-loop version for the ASGI app; send is a coroutine function.
+    def __init__(self, url, send):
+        self.url = url
+        self.send = send
+        self.counters = _new_counters()
+        self._pending = {}
+        self._sending = {}
+        self._handle = None
+        self._in_flight = 0
+        self._tasks = set()
+
+    async def fetch(self, payload):
+        key = make_key(self.url, payload)
+        self.counters["lookups"] += 1
+        entry = self._pending.get(key) or self._sending.get(key)
+        if entry is not None:
+            self.counters["deduped"] += 1
+            future = entry[1]
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = (payload, future)
+            if _send_now(self._pending, self._in_flight):
+                self._flush()
+            elif self._handle is None:
+                self._handle = loop.call_later(_settings["window_ms"] / 1000.0, self._flush)
+        # Shielded so one caller giving up doesn't cancel the others' result.
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        batch = self._pending
+        self._pending = {}
+        if batch:
+            self._in_flight += 1
+            self._sending.update(batch)
+            task = asyncio.ensure_future(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch):
+        try:
+            await self._send_batch(list(batch.values()))
+        finally:
+            self._in_flight -= 1
+            for key in batch:
+                self._sending.pop(key, None)
+            if self._pending and not self._in_flight:
+                self._flush()
+
+    async def _send_batch(self, batch):
+        _record_batch(self.counters, len(batch))
+        payloads = [payload for payload, _ in batch]
+        if _settings.get("array_requests") and len(batch) > 1:
+            self.counters["array_requests"] += 1
+            try:
+                results = await self.send(self.url, payloads)
+            except Exception as err:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(err)
+                return
+            if _array_results(results, len(batch)):
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+                return
+            log.warning("Array scoring response did not match the batch, fanning out",
+                        extra={"fields": {"url": self.url, "items": len(batch)}})
+        self.counters["fanout_requests"] += len(batch)
+        outcomes = await asyncio.gather(*(self.send(self.url, payload) for payload in payloads), return_exceptions=True)
+        for (_, future), outcome in zip(batch, outcomes):
+            if future.done():
+                continue
+            if isinstance(outcome, BaseException):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+def _get(registry, cls, url, send):
+    batcher = registry.get(url)
+    if batcher is None:
+        with _lock:
+            batcher = registry.get(url)
+            if batcher is None:
+                batcher = registry[url] = cls(url, send)
+    return batcher
+
+def fetch(url, payload, send):
+    # send(url, payload) is the unbatched call, used directly when batching is off.
+    if not enabled():
+        return send(url, payload)
+    return _get(_batchers, ScoreBatcher, url, send).fetch(payload)
+
+async def afetch(url, payload, send):
+    if not enabled():
+        return await send(url, payload)
+    return await _get(_async_batchers, AsyncScoreBatcher, url, send).fetch(payload)
+
+def stats():
+    with _lock:
+        batchers = list(_batchers.values()) + list(_async_batchers.values())
+    stats = {"enabled": enabled(), "window_ms": _settings["window_ms"], "max_items": _settings["max_items"],
+             "array_requests": bool(_settings.get("array_requests")), "endpoints": {}}
+    for batcher in batchers:
+        counters = stats["endpoints"].setdefault(batcher.url, _new_counters())
+        for name, value in batcher.counters.items():
+            counters[name] = max(counters[name], value) if name == "largest_batch" else counters[name] + value
+    return stats
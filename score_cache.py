@@ -0,0 +1,208 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Result cache for the provider/member match services. Entries are keyed on
+# the scoring endpoint plus a normalized copy of the payload (keys lowercased,
+# values trimmed, case- and whitespace-folded), so the same NPI/name/address
+# or member scored minutes ago is answered locally. "Not present" results
+# (empty list or empty SCORE) are cached for negative_ttl_seconds; errors
+# (None, or an exception such as ServiceUnavailableError) are never cached. With stale_while_revalidate_seconds > 0 an
+# expired entry is still served for that long while a single background
+# refresh replaces it. Setting score_cache_bypass for a request skips the
+# lookup but still stores the fresh result.
+#
+#   "score_cache": {"enabled": true, "max_entries": 10000, "ttl_seconds": 900,
+#                   "negative_ttl_seconds": 120, "stale_while_revalidate_seconds": 300}
+
+score_cache_bypass = contextvars.ContextVar("score_cache_bypass", default=False)
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+def _normalize(value):
+    if isinstance(value, dict):
+        return {str(key).strip().lower(): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, str):
+        return " ".join(value.split()).upper()
+    return value
+
+def make_key(url, payload):
+    canonical = json.dumps({"url": url, "payload": _normalize(payload)}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def is_negative(result):
+    return not result or not isinstance(result[0], dict) or not result[0].get("SCORE")
+
+class ScoreCache:
+    def __init__(self, enabled=True, max_entries=10000, ttl_seconds=900, negative_ttl_seconds=120,
+                 stale_while_revalidate_seconds=0, refresh_workers=4):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.stale_seconds = stale_while_revalidate_seconds
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._tasks = set()
+        self._lock = threading.Lock()
+        self._refresh_workers = refresh_workers
+        self._refresh_executor = None
+        self._counters = {"hits": 0, "negative_hits": 0, "stale_hits": 0, "misses": 0, "bypassed": 0,
+                          "refreshes": 0, "evictions": 0, "sets": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def lookup(self, key):
+        # Returns (result, FRESH | STALE | MISS).
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None, MISS
+            text, created, negative = entry
+            age = now - created
+            ttl = self.negative_ttl_seconds if negative else self.ttl_seconds
+            if age <= ttl:
+                self._entries.move_to_end(key)
+                self._counters["negative_hits" if negative else "hits"] += 1
+                return json.loads(text), FRESH
+            if age <= ttl + self.stale_seconds:
+                self._counters["stale_hits"] += 1
+                return json.loads(text), STALE
+            del self._entries[key]
+            self._counters["misses"] += 1
+            return None, MISS
+
+    def store(self, key, result):
+        # Only match-service result lists are cached; None means the call failed.
+        if not isinstance(result, list):
+            return
+        text = json.dumps(result)
+        with self._lock:
+            self._entries[key] = (text, time.time(), is_negative(result))
+            self._entries.move_to_end(key)
+            self._counters["sets"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def _claim_refresh(self, key):
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._counters["refreshes"] += 1
+            return True
+
+    def _release_refresh(self, key):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def _refresh(self, key, fetch):
+        try:
+            self.store(key, fetch())
+        except Exception:
+            # Keep serving the stale entry; the next lookup past it will retry.
+            pass
+        finally:
+            self._release_refresh(key)
+
+    def get_or_fetch(self, url, payload, fetch):
+        # fetch() performs the real scoring call and returns its result.
+        if not self.enabled:
+            return fetch()
+        key = make_key(url, payload)
+        if score_cache_bypass.get():
+            self._count("bypassed")
+            result = fetch()
+            self.store(key, result)
+            return result
+        result, state = self.lookup(key)
+        if state == FRESH:
+            return result
+        if state == STALE:
+            if self._claim_refresh(key):
+                self._executor().submit(self._refresh, key, fetch)
+            return result
+        result = fetch()
+        self.store(key, result)
+        return result
+
+    async def _arefresh(self, key, afetch):
+        try:
+            self.store(key, await afetch())
+        except Exception:
+            pass
+        finally:
+            self._release_refresh(key)
+
+    async def aget_or_fetch(self, url, payload, afetch):
+        # Coroutine form for the ASGI app; afetch() is awaited.
+        if not self.enabled:
+            return await afetch()
+        key = make_key(url, payload)
+        if score_cache_bypass.get():
+            self._count("bypassed")
+            result = await afetch()
+            self.store(key, result)
+            return result
+        result, state = self.lookup(key)
+        if state == FRESH:
+            return result
+        if state == STALE:
+            if self._claim_refresh(key):
+                task = asyncio.ensure_future(self._arefresh(key, afetch))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return result
+        result = await afetch()
+        self.store(key, result)
+        return result
+
+    def _executor(self):
+        if self._refresh_executor is None:
+            with self._lock:
+                if self._refresh_executor is None:
+                    self._refresh_executor = ThreadPoolExecutor(
+                        max_workers=self._refresh_workers, thread_name_prefix="score-cache-refresh")
+        return self._refresh_executor
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._entries)
+            stats["refreshing"] = len(self._refreshing)
+        stats["enabled"] = self.enabled
+        stats["ttl_seconds"] = self.ttl_seconds
+        stats["negative_ttl_seconds"] = self.negative_ttl_seconds
+        stats["stale_while_revalidate_seconds"] = self.stale_seconds
+        lookups = stats["hits"] + stats["negative_hits"] + stats["stale_hits"] + stats["misses"]
+        served = stats["hits"] + stats["negative_hits"] + stats["stale_hits"]
+        stats["hit_rate"] = round(served / lookups, 4) if lookups else 0.0
+        return stats
+
+def build_score_cache(settings):
+    settings = settings or {}
+    return ScoreCache(
+        enabled=settings.get("enabled", True),
+        max_entries=settings.get("max_entries", 10000),
+        ttl_seconds=settings.get("ttl_seconds", 900),
+        negative_ttl_seconds=settings.get("negative_ttl_seconds", 120),
+        stale_while_revalidate_seconds=settings.get("stale_while_revalidate_seconds", 0),
+        refresh_workers=settings.get("refresh_workers", 4))
@@ -0,0 +1,198 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+from metrics import stage_seconds
+
+# Declarative stage graphs for the authentication pipeline. Each stage names
+# a cost class and the stages it depends on. run()/arun() always run the
+# cheapest ready stage first, stop at the first stage that returns a failure
+# response, and start independent expensive stages together. Every stage
+# ends up in the report as passed, failed or skipped (with the reason), with
+# its own duration.
+#
+#   cheap      in-memory checks (dates, flags, required fields)
+#   local      CPU-bound local work (EDI validation, parsing, extraction)
+#   expensive  network calls (LLM, scoring services)
+
+CHEAP = "cheap"
+LOCAL = "local"
+EXPENSIVE = "expensive"
+COST_ORDER = {CHEAP: 0, LOCAL: 1, EXPENSIVE: 2}
+
+PASSED = "passed"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+class Stage:
+    def __init__(self, name, cost, run, depends=(), arun=None):
+        # run(ctx) returns None when the stage passes, otherwise the failure
+        # response for the request. arun(ctx) is an optional coroutine
+        # version used by StageGraph.arun.
+        if cost not in COST_ORDER:
+            raise ValueError(f"Unknown cost class {cost!r} for stage {name}")
+        self.name = name
+        self.cost = cost
+        self.run = run
+        self.depends = tuple(depends)
+        self.arun = arun
+
+class StageGraph:
+    def __init__(self, stages):
+        # Dependencies must be declared before the stages that use them,
+        # which also keeps the graph acyclic.
+        seen = set()
+        for stage in stages:
+            missing = [name for name in stage.depends if name not in seen]
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on undeclared stages {missing}")
+            seen.add(stage.name)
+        self.stages = list(stages)
+        self._index = {stage.name: n for n, stage in enumerate(self.stages)}
+
+    def with_arun(self, **aruns):
+        # The same graph with coroutine versions of some stages, by name.
+        return StageGraph([Stage(stage.name, stage.cost, stage.run, stage.depends, aruns.get(stage.name, stage.arun))
+                           for stage in self.stages])
+
+    def _rank(self, stage):
+        return COST_ORDER[stage.cost], self._index[stage.name]
+
+    def _next(self, pending, passed, inline_costs):
+        # Returns (stage to run inline, []) or (None, stages to start together).
+        ready = [stage for stage in pending if all(name in passed for name in stage.depends)]
+        if not ready:
+            return None, []
+        first = min(ready, key=self._rank)
+        if first.cost in inline_costs:
+            return first, []
+        return None, [stage for stage in ready if stage.cost == first.cost]
+
+    def _record(self, report, stage, failure, seconds, passed):
+        report[stage.name] = {"cost": stage.cost, "status": FAILED if failure is not None else PASSED,
+                              "seconds": round(seconds, 6)}
+        if failure is None:
+            passed.add(stage.name)
+            return None
+        return stage.name, failure
+
+    def _report(self, report, pending, abandoned, failed):
+        for stage in abandoned:
+            report[stage.name] = {"cost": stage.cost, "status": SKIPPED,
+                                  "skip_reason": f"abandoned after {failed[0]} failed"}
+        for stage in pending:
+            reason = f"{failed[0]} failed" if failed else "dependencies not met"
+            report[stage.name] = {"cost": stage.cost, "status": SKIPPED, "skip_reason": reason}
+        return {stage.name: report[stage.name] for stage in self.stages}
+
+    def run(self, ctx, executor=None):
+        # Returns (failure_response or None, report). Local stages run in the
+        # caller; expensive ones on executor, or in the caller when it is None.
+        inline_costs = (CHEAP, LOCAL) if executor is not None else (CHEAP, LOCAL, EXPENSIVE)
+        report = {}
+        pending = list(self.stages)
+        passed = set()
+        running = {}
+        failed = None
+        while failed is None:
+            stage, batch = self._next(pending, passed, inline_costs)
+            if stage is not None:
+                pending.remove(stage)
+                failure, seconds = _timed(stage, ctx)
+                failed = self._record(report, stage, failure, seconds, passed)
+                continue
+            for stage in batch:
+                pending.remove(stage)
+                running[executor.submit(_timed, stage, ctx)] = stage
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in sorted(finished, key=lambda f: self._index[running[f].name]):
+                stage = running.pop(future)
+                failure, seconds = future.result()
+                outcome = self._record(report, stage, failure, seconds, passed)
+                failed = failed or outcome
+        report = self._report(report, pending, running.values(), failed)
+        return (failed[1] if failed else None), report
+
+    async def arun(self, ctx):
+        # Event-loop version: cheap stages without arun run inline, the rest
+        # as tasks (sync stages via asyncio.to_thread).
+        report = {}
+        pending = list(self.stages)
+        passed = set()
+        running = {}
+        failed = None
+        while failed is None:
+            stage, batch = self._next(pending, passed, (CHEAP,))
+            if stage is not None:
+                if stage.arun is None:
+                    pending.remove(stage)
+                    failure, seconds = _timed(stage, ctx)
+                    failed = self._record(report, stage, failure, seconds, passed)
+                    continue
+                batch = [stage]
+            for stage in batch:
+                pending.remove(stage)
+                running[asyncio.ensure_future(_atimed(stage, ctx))] = stage
+            if not running:
+                break
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(finished, key=lambda t: self._index[running[t].name]):
+                stage = running.pop(task)
+                failure, seconds = task.result()
+                outcome = self._record(report, stage, failure, seconds, passed)
+                failed = failed or outcome
+        report = self._report(report, pending, running.values(), failed)
+        return (failed[1] if failed else None), report
+
+def _timed(stage, ctx):
+    start = time.perf_counter()
+    try:
+        return stage.run(ctx), time.perf_counter() - start
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, stage.name)
+
+async def _atimed(stage, ctx):
+    start = time.perf_counter()
+    try:
+        if stage.arun is not None:
+            failure = await stage.arun(ctx)
+        else:
+            failure = await asyncio.to_thread(stage.run, ctx)
+        return failure, time.perf_counter() - start
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, stage.name)
+
+class SharedResults:
+    # Results shared by the claims of one request or batch: fn() runs once
+    # per key and every other claim asking for that key waits for it.
+    def __init__(self):
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, fn):
+        with self._lock:
+            future = self._results.get(key)
+            owner = future is None
+            if owner:
+                future = self._results[key] = Future()
+        if owner:
+            try:
+                future.set_result(fn())
+            except Exception as err:
+                future.set_exception(err)
+        return future.result()
+
+    async def aget(self, key, afn):
+        task = self._results.get(key)
+        if task is None:
+            task = self._results[key] = asyncio.ensure_future(afn())
+        # Shielded so one claim being cancelled doesn't cancel the others' result.
+        return await asyncio.shield(task)
+
+    def count(self, kind):
+        # Keys are (kind, identity) tuples.
+        with self._lock:
+            return sum(1 for key in self._results if key[0] == kind)
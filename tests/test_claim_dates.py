@@ -0,0 +1,26 @@
+import datetime
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from claim_dates import check_window
+
+ACCEPTED = ("active",)
+
+def at(*args):
+    return datetime.datetime(*args)
+
+def test_end_date_is_inclusive_for_the_whole_day():
+    assert check_window("active", ACCEPTED, "01-01-2024", "12-31-2024", at(2024, 12, 31, 0, 0)) is None
+    assert check_window("active", ACCEPTED, "01-01-2024", "12-31-2024", at(2024, 12, 31, 23, 59, 59)) is None
+    assert check_window("active", ACCEPTED, "01-01-2024", "12-31-2024", at(2025, 1, 1)) == "expired"
+
+def test_start_date_opens_at_midnight():
+    assert check_window("active", ACCEPTED, "01-01-2024", "12-31-2024", at(2024, 1, 1)) is None
+    assert check_window("active", ACCEPTED, "01-01-2024", "12-31-2024", at(2023, 12, 31, 23, 59)) == "not_started"
+
+def test_flag_and_malformed_dates():
+    assert check_window("inactive", ACCEPTED, "01-01-2024", "12-31-2024", at(2024, 6, 1)) == "not_active"
+    assert check_window("Active ", ACCEPTED, "20240101", "20241231", at(2024, 6, 1)) is None
+    assert check_window("active", ACCEPTED, "2024-01-01", "12-31-2024", at(2024, 6, 1)) == "malformed_date"
@@ -0,0 +1,53 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import field_classifiers
+from field_classifiers import (NAME, NPI, TAXONOMY, classified_column, classify_column, find_name, find_npi,
+                               find_taxonomy, is_npi, is_npi_shaped, npi_check_digit_valid)
+
+# 1234567893 is the worked example in the CMS NPI check digit spec.
+VALID_NPIS = ["1234567893", "1932102084"]
+INVALID_NPIS = ["1234567890", "1932102085"]
+
+def test_check_digit_accepts_valid_npis():
+    for npi in VALID_NPIS:
+        assert npi_check_digit_valid(npi)
+        assert is_npi(npi)
+
+def test_check_digit_rejects_invalid_npis():
+    for npi in INVALID_NPIS:
+        assert not npi_check_digit_valid(npi)
+        assert not is_npi(npi)
+        assert is_npi_shaped(npi)
+
+def test_is_npi_requires_ten_ascii_digits():
+    for value in ["123456789", "12345678930", "123456789X", "１２３４５６７８９３", ""]:
+        assert not is_npi(value)
+
+def test_find_npi_keeps_a_bad_check_digit_for_the_npi_check():
+    assert find_npi(["82", "2", "RAVI ADUSUMILLI", "XX", "1234567890"]) == "1234567890"
+    assert find_npi(["82", "2", "RAVI ADUSUMILLI", "XX", "12345"]) is None
+
+def test_classify_column_flags_each_element():
+    column = ["82", "RAVI ADUSUMILLI", "XX", "1932102084", "PXC", "207RC0000X", "82"]
+    assert classify_column(column) == [0, NAME, 0, NPI, 0, TAXONOMY, 0]
+
+def test_classified_column_classifies_each_distinct_value_once(monkeypatch):
+    seen = []
+    classify = field_classifiers.classify
+    monkeypatch.setattr(field_classifiers, "classify", lambda s: seen.append(s) or classify(s))
+    nm1 = ["82", "1", "RAVI ADUSUMILLI", "XX", "1932102084"]
+    prv = ["PE", "PXC", "207RC0000X"]
+    with classified_column(nm1 * 3 + prv * 3):
+        for _ in range(3):
+            assert find_name(nm1) == "RAVI ADUSUMILLI"
+            assert find_npi(nm1) == "1932102084"
+            assert find_taxonomy(prv) == "207RC0000X"
+    assert sorted(seen) == sorted(set(nm1 + prv))
+
+def test_finders_fall_back_outside_the_column():
+    with classified_column(["82", "XX"]):
+        assert find_npi(["XX", "1234567893"]) == "1234567893"
+    assert find_name(["82", "JANE SMITH"]) == "JANE SMITH"
@@ -0,0 +1,21 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from retry_policy import CircuitOpenError, RetryPolicy, ServiceUnavailableError
+
+def test_attempts_report_time_left_before_the_deadline():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.0, deadline=5.0)
+    attempts = list(policy.attempts())
+    assert [attempt for attempt, _ in attempts] == [0, 1, 2]
+    assert all(0 < remaining <= 5.0 for _, remaining in attempts)
+
+def test_attempts_without_deadline_have_no_time_limit():
+    policy = RetryPolicy(max_attempts=2, base_delay=0.0, deadline=None)
+    assert list(policy.attempts()) == [(0, None), (1, None)]
+
+def test_circuit_open_is_a_service_unavailable_error():
+    err = CircuitOpenError("http://scoring/provider-match/")
+    assert isinstance(err, ServiceUnavailableError)
+    assert err.endpoint == "http://scoring/provider-match/"
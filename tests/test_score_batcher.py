@@ -0,0 +1,106 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import score_batcher
+from score_batcher import AsyncScoreBatcher, ScoreBatcher
+
+@pytest.fixture
+def settings():
+    saved = dict(score_batcher._settings)
+    yield score_batcher._settings
+    score_batcher._settings.clear()
+    score_batcher._settings.update(saved)
+
+def test_lookup_on_idle_endpoint_does_not_wait_for_the_window(settings):
+    settings.update(window_ms=1000, array_requests=True)
+    batcher = ScoreBatcher("http://scoring/", lambda url, payload: {"echo": payload})
+    start = time.perf_counter()
+    assert batcher.fetch({"npi": "1"}) == {"echo": {"npi": "1"}}
+    assert time.perf_counter() - start < 0.5
+
+def test_fanout_mode_sends_every_lookup_at_once(settings):
+    settings.update(window_ms=1000, array_requests=False)
+    both_sent = threading.Barrier(2, timeout=5)
+    def send(url, payload):
+        # Only returns once both lookups are being sent side by side.
+        both_sent.wait()
+        return payload
+    batcher = ScoreBatcher("http://scoring/", send)
+    results = {}
+    threads = [threading.Thread(target=lambda n=n: results.setdefault(n, batcher.fetch({"npi": n}))) for n in "12"]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert results == {"1": {"npi": "1"}, "2": {"npi": "2"}}
+    assert time.perf_counter() - start < 0.5
+
+def test_array_mode_collects_lookups_behind_an_inflight_batch(settings):
+    settings.update(window_ms=1000, array_requests=True, max_items=32)
+    release = threading.Event()
+    sent = []
+    def send(url, payload):
+        sent.append(payload)
+        if len(sent) == 1:
+            release.wait(5)
+            return payload
+        return list(payload)
+    batcher = ScoreBatcher("http://scoring/", send)
+    first = threading.Thread(target=batcher.fetch, args=({"npi": "1"},))
+    first.start()
+    while not sent:
+        time.sleep(0.001)
+    second = batcher.submit({"npi": "2"})
+    third = batcher.submit({"npi": "3"})
+    start = time.perf_counter()
+    release.set()
+    first.join(5)
+    # Sent together as soon as the first batch returned, not after window_ms.
+    assert [second.result(5), third.result(5)] == [{"npi": "2"}, {"npi": "3"}]
+    assert time.perf_counter() - start < 0.5
+    assert sent[1] == [{"npi": "2"}, {"npi": "3"}]
+
+def test_identical_lookup_joins_the_inflight_request(settings):
+    settings.update(array_requests=False)
+    release = threading.Event()
+    calls = []
+    def send(url, payload):
+        calls.append(payload)
+        release.wait(5)
+        return payload
+    batcher = ScoreBatcher("http://scoring/", send)
+    first = threading.Thread(target=batcher.fetch, args=({"npi": "1"},))
+    first.start()
+    while not calls:
+        time.sleep(0.001)
+    duplicate = batcher.submit({"NPI": " 1 "})
+    release.set()
+    first.join(5)
+    assert duplicate.result(5) == {"npi": "1"}
+    assert len(calls) == 1
+    assert batcher.counters["deduped"] == 1
+
+def test_async_array_mode_sends_idle_lookup_at_once_and_collects_the_rest(settings):
+    settings.update(window_ms=1000, array_requests=True, max_items=32)
+    sent = []
+    async def send(url, payload):
+        sent.append(payload)
+        await asyncio.sleep(0.01)
+        return list(payload) if isinstance(payload, list) else payload
+    async def main():
+        batcher = AsyncScoreBatcher("http://scoring/", send)
+        start = time.perf_counter()
+        results = await asyncio.gather(*(batcher.fetch({"npi": n}) for n in "123"))
+        return results, time.perf_counter() - start
+    results, elapsed = asyncio.run(main())
+    assert results == [{"npi": "1"}, {"npi": "2"}, {"npi": "3"}]
+    assert sent == [{"npi": "1"}, [{"npi": "2"}, {"npi": "3"}]]
+    assert elapsed < 0.5
@@ -0,0 +1,69 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from x12_interchange import split_transactions
+from x12_tokenizer import tokenize
+
+ISA = "ISA*00*          *00*          *ZZ*SUBMITTER      *ZZ*RECEIVER       *240101*1200*U*00401*000000905*0*P*:~"
+STANDARD_GS = "GS*HI*SUBMITTER*RECEIVER*20240101*1200*77*X*004010X278A1~"
+# generate_edi_278 writes the payer after the receiver, pushing the group
+# control number from GS06 to GS07.
+GENERATOR_GS = "GS*HI*SUBMITTER*RECEIVER*PAYER*20240101*1200*77*X*004010X278A1~"
+
+def transaction(control, body=("BHT*0007*13*REF1*20240101*1200~", "HL*1**20*1~"), count=None):
+    count = len(body) + 2 if count is None else count
+    return f"ST*278*{control}~" + "".join(body) + f"SE*{count}*{control}~"
+
+def interchange(gs, transactions, group_count=None, ge_control="77"):
+    group_count = len(transactions) if group_count is None else group_count
+    return ISA + gs + "".join(transactions) + f"GE*{group_count}*{ge_control}~" + "IEA*1*000000905~"
+
+def test_standard_gs_splits_clean_transactions():
+    result = split_transactions(tokenize(interchange(STANDARD_GS, [transaction("0001"), transaction("0002")])))
+    assert [t["transaction_control"] for t in result] == ["0001", "0002"]
+    assert all(t["group_control"] == "77" for t in result)
+    assert all(t["errors"] == [] for t in result)
+    # Each transaction is wrapped in its own envelope.
+    assert [seg[0] for seg in result[1]["segments"]] == ["ISA", "GS", "ST", "BHT", "HL", "SE", "GE", "IEA"]
+    assert result[1]["segments"][2][2] == "0002"
+
+def test_generator_gs_reads_control_number_from_gs07():
+    result = split_transactions(tokenize(interchange(GENERATOR_GS, [transaction("0001")])))
+    assert result[0]["group_control"] == "77"
+    assert result[0]["errors"] == []
+
+def test_group_control_mismatch_is_reported():
+    result = split_transactions(tokenize(interchange(STANDARD_GS, [transaction("0001")], ge_control="78")))
+    assert result[0]["errors"] == ["GE control number 78 does not match GS 77."]
+
+def test_se_count_mismatch_only_affects_its_transaction():
+    result = split_transactions(tokenize(interchange(STANDARD_GS, [transaction("0001", count=9), transaction("0002")])))
+    assert result[0]["errors"] == ["SE segment count 9 does not match 4 segments."]
+    assert result[1]["errors"] == []
+
+def test_ge_count_mismatch_is_reported_for_every_transaction():
+    result = split_transactions(tokenize(interchange(STANDARD_GS, [transaction("0001"), transaction("0002")], group_count=3)))
+    expected = "GE transaction count 3 does not match 2 transactions."
+    assert [expected in t["errors"] for t in result] == [True, True]
+
+def test_missing_se_runs_into_the_group_trailer():
+    body = "ST*278*0001~BHT*0007*13*REF1*20240101*1200~HL*1**20*1~"
+    result = split_transactions(tokenize(ISA + STANDARD_GS + body + "GE*1*77~IEA*1*000000905~"))
+    assert len(result) == 1
+    assert result[0]["errors"] == ["Missing SE segment."]
+    assert [seg[0] for seg in result[0]["segments"]] == ["ISA", "GS", "ST", "BHT", "HL", "GE", "IEA"]
+
+def test_missing_se_does_not_swallow_the_next_transaction():
+    orphan = "ST*278*0001~BHT*0007*13*REF1*20240101*1200~"
+    result = split_transactions(tokenize(interchange(STANDARD_GS, [orphan, transaction("0002")])))
+    assert [t["transaction_control"] for t in result] == ["0001", "0002"]
+    assert result[0]["errors"] == ["Missing SE segment."]
+    assert result[1]["errors"] == []
+
+def test_st_outside_a_group_reports_missing_gs_and_ge():
+    result = split_transactions(tokenize(ISA + transaction("0001") + "IEA*1*000000905~"))
+    assert len(result) == 1
+    assert "Missing GS segment." in result[0]["errors"]
+    assert "Missing GE segment." in result[0]["errors"]
@@ -0,0 +1,175 @@
+# Splits a tokenized interchange (see x12_tokenizer) into its functional
+# groups (GS/GE) and transaction sets (ST/SE) and checks the control
+# counts of each envelope independently:
+#
+#   SE01 == number of segments from ST to SE, SE02 == ST02
+#   GE01 == number of transaction sets in the group, GE02 == GS06
+#   IEA01 == number of functional groups, IEA02 == ISA13
+#
+# split_transactions() returns one entry per transaction set. Each entry
+# carries its own errors (including those of the enclosing group and
+# interchange) and a self-contained segment list, ISA, GS, ST..SE, GE, IEA,
+# that the single-transaction validator and extractor can consume.
+#
+# validate_edi_278() is that single-transaction validator, shared by the
+# /validate and /authentication_flow services.
+
+import request_log
+from x12_tokenizer import tokenize
+
+log = request_log.get_logger("x12")
+
+def _element(seg, index):
+    return seg[index].strip() if seg is not None and len(seg) > index else ""
+
+def _count_mismatch(seg, index, actual):
+    try:
+        return int(_element(seg, index)) != actual
+    except ValueError:
+        return True
+
+def group_control_number(gs):
+    # Standard GS has 8 elements with the control number in GS06;
+    # generate_edi_278 inserts the payer after the receiver, shifting it to GS07.
+    return _element(gs, 7) if gs is not None and len(gs) > 9 else _element(gs, 6)
+
+def split_interchange(segments):
+    interchange = {"isa": None, "iea": None, "groups": []}
+    group = None
+    transaction = None
+    for seg in segments:
+        tag = seg[0].strip()
+        if tag == "ISA":
+            interchange["isa"] = seg
+        elif tag == "GS":
+            group = {"gs": seg, "ge": None, "transactions": []}
+            interchange["groups"].append(group)
+        elif tag == "ST":
+            if group is None:
+                group = {"gs": None, "ge": None, "transactions": []}
+                interchange["groups"].append(group)
+            transaction = [seg]
+            group["transactions"].append(transaction)
+        elif tag == "SE" and transaction is not None:
+            transaction.append(seg)
+            transaction = None
+        elif tag == "GE" and group is not None:
+            group["ge"] = seg
+            group = None
+            transaction = None
+        elif tag == "IEA":
+            interchange["iea"] = seg
+        elif transaction is not None:
+            transaction.append(seg)
+    return interchange
+
+def interchange_errors(interchange):
+    errors = []
+    isa, iea = interchange["isa"], interchange["iea"]
+    if isa is None:
+        errors.append("Missing or invalid ISA segment.")
+    if iea is None:
+        errors.append("Missing IEA segment.")
+    else:
+        if _count_mismatch(iea, 1, len(interchange["groups"])):
+            errors.append(f"IEA group count {_element(iea, 1)} does not match {len(interchange['groups'])} groups.")
+        if isa is not None and _element(iea, 2) != _element(isa, 13):
+            errors.append(f"IEA control number {_element(iea, 2)} does not match ISA {_element(isa, 13)}.")
+    return errors
+
+def group_errors(group):
+    errors = []
+    gs, ge = group["gs"], group["ge"]
+    if gs is None:
+        errors.append("Missing GS segment.")
+    if ge is None:
+        errors.append("Missing GE segment.")
+    else:
+        if _count_mismatch(ge, 1, len(group["transactions"])):
+            errors.append(f"GE transaction count {_element(ge, 1)} does not match {len(group['transactions'])} transactions.")
+        if gs is not None and _element(ge, 2) != group_control_number(gs):
+            errors.append(f"GE control number {_element(ge, 2)} does not match GS {group_control_number(gs)}.")
+    return errors
+
+def transaction_errors(transaction):
+    st, se = transaction[0], transaction[-1]
+    if len(transaction) < 2 or se[0].strip() != "SE":
+        return ["Missing SE segment."]
+    errors = []
+    if _count_mismatch(se, 1, len(transaction)):
+        errors.append(f"SE segment count {_element(se, 1)} does not match {len(transaction)} segments.")
+    if _element(se, 2) != _element(st, 2):
+        errors.append(f"SE control number {_element(se, 2)} does not match ST {_element(st, 2)}.")
+    return errors
+
+def split_transactions(segments):
+    interchange = split_interchange(segments)
+    envelope_errors = interchange_errors(interchange)
+    transactions = []
+    for group in interchange["groups"]:
+        errors_for_group = envelope_errors + group_errors(group)
+        for transaction in group["transactions"]:
+            envelope_head = [seg for seg in (interchange["isa"], group["gs"]) if seg is not None]
+            envelope_tail = [seg for seg in (group["ge"], interchange["iea"]) if seg is not None]
+            transactions.append({
+                "group_control": group_control_number(group["gs"]),
+                "transaction_control": _element(transaction[0], 2),
+                "segments": envelope_head + transaction + envelope_tail,
+                "errors": errors_for_group + transaction_errors(transaction),
+            })
+    return transactions
+
+def validate_edi_278(content):
+    segments = tokenize(content) if isinstance(content, str) else content
+
+    # One pass over the segment tags instead of a scan per check. Works on a
+    # list or on a lazy segment iterator, so large files can be validated
+    # while streaming.
+    first_tag = last_tag = None
+    has_gs = has_ge = False
+    st_index = se_index = None
+    se_fields = None
+    for i, seg in enumerate(segments):
+        tag = seg[0]
+        if first_tag is None:
+            first_tag = tag
+        last_tag = tag
+        if tag == "GS":
+            has_gs = True
+        elif tag == "GE":
+            has_ge = True
+        elif tag == "ST" and st_index is None:
+            st_index = i
+        elif tag == "SE" and st_index is not None and se_index is None:
+            se_index = i
+            se_fields = seg
+    if first_tag != "ISA":
+        log.warning("EDI validation error: Missing or invalid ISA segment")
+        return False
+    if not has_gs:
+        log.warning("EDI validation error: Missing GS segment")
+        return False
+    if st_index is None:
+        log.warning("EDI validation error: Missing ST segment")
+        return False
+    if se_index is None:
+        log.warning("EDI validation error: Missing SE segment")
+        return False
+
+    transaction_count = se_index - st_index + 1
+    try:
+        expected_count = int(se_fields[1])
+    except (IndexError, ValueError):
+        log.warning("EDI validation error: Invalid SE segment count")
+        return False
+    log.debug("SE segment count", extra={"fields": {"transaction_count": transaction_count, "expected_count": expected_count}})
+    #if transaction_count != expected_count:
+        #print("Error: Transaction segment count mismatch.")
+        #return False
+    if not has_ge:
+        log.warning("EDI validation error: Missing GE segment")
+        return False
+    if last_tag != "IEA":
+        log.warning("EDI validation error: Missing IEA segment")
+        return False
+    return True
@@ -0,0 +1,134 @@
+from collections import namedtuple
+
+# Single-pass X12 tokenizer shared by validation, parsing and JSON conversion.
+#
+# The delimiters are read from the ISA header instead of being assumed: the
+# element separator is the character right after "ISA", and the sub-element
+# separator and segment terminator are the two characters that follow the
+# sixteenth element separator. Counting separators (rather than using the
+# fixed 106-byte ISA offsets) copes with the unpadded sender/receiver IDs
+# that generate_edi_278 writes.
+#
+# iter_segments() yields each segment lazily as a list of elements, from a
+# string or from a file-like object read in chunks. iter_segments_bytes()
+# does the same over an iterable of byte chunks (a chunked blob download or
+# mmap slices) and decodes one segment at a time, so peak memory is bounded
+# by the chunk and segment size rather than the file size.
+
+Delimiters = namedtuple("Delimiters", ["element", "segment", "sub_element"])
+
+class Segment:
+    # Compact parsed segment: no per-instance __dict__, elements kept as a tuple.
+    __slots__ = ("tag", "elements")
+
+    def __init__(self, tag, elements):
+        self.tag = tag
+        self.elements = elements
+
+    def to_dict(self):
+        return {"tag": self.tag, "elements": list(self.elements)}
+
+    def __repr__(self):
+        return f"Segment({self.tag!r}, {self.elements!r})"
+
+DEFAULT_DELIMITERS = Delimiters("*", "~", ":")
+
+CHUNK_SIZE = 64 * 1024
+
+def detect_delimiters(header):
+    header = header.lstrip()
+    if not header.startswith("ISA") or len(header) < 4:
+        return DEFAULT_DELIMITERS
+    element = header[3]
+    pos = 3
+    for _ in range(15):
+        pos = header.find(element, pos + 1)
+        if pos == -1:
+            return DEFAULT_DELIMITERS
+    if pos + 2 >= len(header):
+        return DEFAULT_DELIMITERS
+    sub_element = header[pos + 1]
+    segment = header[pos + 2]
+    if segment.isspace() or segment.isalnum():
+        segment = DEFAULT_DELIMITERS.segment
+    return Delimiters(element, segment, sub_element)
+
+def _split_text(text, terminator):
+    start = 0
+    while True:
+        end = text.find(terminator, start)
+        if end == -1:
+            tail = text[start:].strip()
+            if tail:
+                yield tail
+            return
+        seg = text[start:end].strip()
+        if seg:
+            yield seg
+        start = end + 1
+
+def _split_stream(stream, first_chunk, terminator, chunk_size):
+    buffer = first_chunk
+    while True:
+        start = 0
+        end = buffer.find(terminator)
+        while end != -1:
+            seg = buffer[start:end].strip()
+            if seg:
+                yield seg
+            start = end + 1
+            end = buffer.find(terminator, start)
+        buffer = buffer[start:]
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk
+    tail = buffer.strip()
+    if tail:
+        yield tail
+
+def iter_segments(source, delimiters=None, chunk_size=CHUNK_SIZE):
+    # Yields [tag, element1, element2, ...] for every non-empty segment.
+    if isinstance(source, str):
+        delimiters = delimiters or detect_delimiters(source[:512])
+        raw_segments = _split_text(source, delimiters.segment)
+    else:
+        first_chunk = source.read(chunk_size)
+        delimiters = delimiters or detect_delimiters(first_chunk[:512])
+        raw_segments = _split_stream(source, first_chunk, delimiters.segment, chunk_size)
+    element = delimiters.element
+    for seg in raw_segments:
+        yield seg.split(element)
+
+def iter_segments_bytes(chunks, delimiters=None, encoding="utf-8"):
+    chunks = iter(chunks)
+    buffer = b""
+    for chunk in chunks:
+        buffer += bytes(chunk)
+        if len(buffer) >= 512:
+            break
+    if delimiters is None:
+        delimiters = detect_delimiters(buffer[:512].decode(encoding, "replace"))
+    terminator = delimiters.segment.encode(encoding)
+    element = delimiters.element
+    while True:
+        start = 0
+        end = buffer.find(terminator)
+        while end != -1:
+            seg = buffer[start:end].strip()
+            if seg:
+                yield seg.decode(encoding).split(element)
+            start = end + len(terminator)
+            end = buffer.find(terminator, start)
+        buffer = buffer[start:]
+        chunk = next(chunks, None)
+        if chunk is None:
+            break
+        buffer += bytes(chunk)
+    tail = buffer.strip()
+    if tail:
+        yield tail.decode(encoding).split(element)
+
+def tokenize(source, delimiters=None):
+    # Materialize the segments once when several consumers need them.
+    return list(iter_segments(source, delimiters))